@@ -0,0 +1,223 @@
+"""Heatwave dashboard hot paths: load, derive, summarise, figures, serialisation."""
+
+import gzip
+
+import plotly.io as pio
+import pytest
+
+from heatwave import core
+from heatwave.cache import load_columns
+from heatwave.cube import ScenarioCube
+from heatwave.encoding import ENCODINGS
+from heatwave.figures import MAP_KINDS, build_crossing_figure, build_map_figure, build_spread_figure
+from heatwave.ranking import Ranking
+from heatwave.spread import SPREAD_METRICS, EnsembleSpread
+from heatwave.regions import DEFAULT_BOUNDARY
+from heatwave.store import DerivedBuffer
+from heatwave.summary import column_summary
+from heatwave.table import SortIndex
+from heatwave.warming import WarmingCurve
+from heatwave.weights import area_weights, weighted_summary
+from px_reference import build_map_figure_px
+
+BOUNDARY_PATH = DEFAULT_BOUNDARY
+
+
+def _record_payload(benchmark, spec):
+    raw = spec.encode('utf-8')
+    benchmark.extra_info['bytes'] = len(raw)
+    benchmark.extra_info['gzip_bytes'] = len(gzip.compress(raw))
+
+
+# ---- Load ----
+
+def bench_load_columns_cold(benchmark, grid_csv, tmp_path):
+    """Parse the CSV and write the columnar cache."""
+    rounds = iter(range(1000))
+
+    def fresh_cache():
+        return (str(tmp_path / str(next(rounds))),), {}
+
+    benchmark.pedantic(lambda cache_dir: load_columns(grid_csv, cache_dir), setup=fresh_cache, rounds=3)
+
+
+def bench_load_data(benchmark, grid_csv, cache_dir, dataset):
+    """What a rerun pays in ``load_data()``: a ``stat`` of the unchanged CSV."""
+    benchmark(core.load, grid_csv, cache_dir)
+
+
+def bench_load_data_changed(benchmark, grid_csv, cache_dir, dataset):
+    """After the CSV's mtime changes: hash it and map the cache again."""
+    def touched():
+        core._loaded.clear()
+        return (grid_csv, cache_dir), {}
+
+    benchmark.pedantic(core.load, setup=touched, rounds=20)
+
+
+def bench_cube_build(benchmark, dataset):
+    """Includes the area-weighted median change for every selection."""
+    benchmark(ScenarioCube, dataset.store, dataset.weights)
+
+
+def bench_summary_build(benchmark, dataset):
+    benchmark(column_summary, dataset.store)
+
+
+def bench_spread_build(benchmark, dataset):
+    """Spread, relative spread and agreement for every scenario and baseline."""
+    benchmark(EnsembleSpread, dataset.cube, dataset.weights)
+
+
+def bench_weights_build(benchmark, dataset):
+    benchmark(area_weights, dataset.store)
+
+
+def bench_weighted_summary_build(benchmark, dataset):
+    benchmark(weighted_summary, dataset.store, dataset.weights)
+
+
+def bench_ranking_build(benchmark, dataset):
+    benchmark(Ranking, dataset.store, dataset.cube)
+
+
+def bench_warming_curve_build(benchmark, dataset):
+    benchmark(WarmingCurve, dataset.store)
+
+
+# ---- Per-selection compute ----
+
+def bench_derive(benchmark, dataset, selection):
+    benchmark(core.derive, selection, dataset)
+
+
+def bench_summarise(benchmark, dataset, selection):
+    benchmark(core.summarise, selection, dataset)
+
+
+def bench_warming_level(benchmark, dataset, selection):
+    """The grid at an interpolated level, written into a reused buffer."""
+    out = DerivedBuffer(dataset.store.size).slot('level')
+    benchmark(dataset.warming.at, 2.7, selection.confidence, out=out)
+
+
+def bench_crossing(benchmark, dataset, selection):
+    """Inverse interpolation for a threshold not seen before."""
+    thresholds = iter(range(1_000_000))
+
+    def next_threshold():
+        return (5 + next(thresholds) % 1000 / 100, selection.confidence), {}
+
+    benchmark.pedantic(dataset.warming.crossing, setup=next_threshold, rounds=50)
+
+
+def bench_summarise_level(benchmark, dataset, selection):
+    """A slider move: a level not seen before, so nothing is cached."""
+    levels = iter(range(1_000_000))
+
+    def next_level():
+        # Distinct levels inside (2.5, 3) so every round misses the cache
+        return (selection._replace(scenario=2.5 + (next(levels) % 4999 + 1) / 10_000), dataset), {}
+
+    benchmark.pedantic(core.summarise, setup=next_level, rounds=50)
+
+
+def bench_sort_order(benchmark, dataset, selection):
+    """A column's first sort, before its order is cached."""
+    name = core.derive(selection, dataset)['scenario_col']
+    values = dataset.store.column(name)
+    benchmark.pedantic(lambda: SortIndex().order(name, values, descending=True), rounds=20)
+
+
+@pytest.mark.parametrize('sort_by', ['projected', 'change'])
+def bench_table_page(benchmark, dataset, selection, sort_by):
+    """Paging through a sorted, latitude-filtered grid once the order is cached."""
+    pages = iter(range(1_000_000))
+
+    def next_page():
+        return (selection, sort_by, True, next(pages) % 5), {'latitude': (50.0, 53.0), 'data': dataset}
+
+    benchmark.pedantic(core.table_page, setup=next_page, rounds=50)
+
+
+# ---- Figures ----
+
+@pytest.mark.parametrize('kind', MAP_KINDS)
+def bench_map_figure(benchmark, dataset, selection, kind):
+    """Map construction bypassing the ``FigureCache``.
+
+    With the raster backend the rendered image still comes from the on-disk
+    raster cache after the first round.
+    """
+    buffer = DerivedBuffer(dataset.store.size)
+    benchmark.extra_info['backend'] = dataset.backend
+    benchmark(build_map_figure, kind, dataset.store, dataset.cube, *selection,
+              buffer=buffer, backend=dataset.backend)
+
+
+@pytest.mark.parametrize('kind', MAP_KINDS)
+def bench_map_figure_px(benchmark, dataset, selection, kind):
+    """The original Plotly Express construction, for comparison."""
+    if dataset.backend != 'scatter':
+        pytest.skip('Plotly Express reference only applies to the scatter backend')
+    benchmark(build_map_figure_px, kind, dataset.store, dataset.cube, *selection)
+
+
+@pytest.mark.parametrize('kind', MAP_KINDS)
+def bench_map_figure_cached(benchmark, dataset, selection, kind):
+    """A repeat selection served from the ``FigureCache``."""
+    core.build_figures(selection, (kind,), dataset)
+    benchmark(core.build_figures, selection, (kind,), dataset)
+
+
+@pytest.mark.parametrize('kind', core.CHART_KINDS)
+def bench_chart_figure(benchmark, dataset, selection, kind):
+    core.build_figures(selection, (kind,), dataset, boundary_path=BOUNDARY_PATH)
+    benchmark(core.build_figures, selection, (kind,), dataset, boundary_path=BOUNDARY_PATH)
+
+
+def bench_crossing_figure(benchmark, dataset, selection):
+    buffer = DerivedBuffer(dataset.store.size)
+    crossing = dataset.warming.crossing(core.DEFAULT_THRESHOLD, selection.confidence)
+    benchmark.extra_info['backend'] = dataset.backend
+    benchmark(build_crossing_figure, dataset.store, crossing, core.DEFAULT_THRESHOLD, selection.confidence,
+              buffer=buffer, backend=dataset.backend)
+
+
+@pytest.mark.parametrize('metric', SPREAD_METRICS)
+def bench_spread_figure(benchmark, dataset, selection, metric):
+    buffer = DerivedBuffer(dataset.store.size)
+    spread = core.spread(selection, dataset)
+    benchmark.extra_info['backend'] = dataset.backend
+    benchmark(build_spread_figure, metric, dataset.store, spread, selection.scenario, selection.baseline,
+              buffer=buffer, backend=dataset.backend)
+
+
+def bench_spread_level(benchmark, dataset, selection):
+    """Band spread at a warming level not seen before."""
+    levels = iter(range(1_000_000))
+
+    def next_level():
+        return (selection._replace(scenario=2.5 + (next(levels) % 4999 + 1) / 10_000), dataset), {}
+
+    benchmark.pedantic(core.spread, setup=next_level, rounds=50)
+
+
+# ---- Serialisation (what st.plotly_chart sends) ----
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+@pytest.mark.parametrize('kind', MAP_KINDS)
+def bench_serialise_map(benchmark, dataset, selection, kind, encoding):
+    fig = build_map_figure(kind, dataset.store, dataset.cube, *selection,
+                           encoding=encoding, backend=dataset.backend)
+    spec = benchmark(pio.to_json, fig, validate=False)
+    _record_payload(benchmark, spec)
+
+
+@pytest.mark.parametrize('kind', MAP_KINDS)
+def bench_serialise_map_px(benchmark, dataset, selection, kind):
+    if dataset.backend != 'scatter':
+        pytest.skip('Plotly Express reference only applies to the scatter backend')
+    fig = build_map_figure_px(kind, dataset.store, dataset.cube, *selection)
+    spec = benchmark(pio.to_json, fig, validate=False)
+    _record_payload(benchmark, spec)
@@ -0,0 +1,75 @@
+"""Montreal election dashboard: data load, aggregation, figures, serialisation."""
+
+import gzip
+import json
+
+import plotly.express as px
+import plotly.io as pio
+import pytest
+
+from montreal import core, geometry
+
+NARROW_SELECTION = core.Selection(('Coderre', 'Joly'), ('plurality',))
+SELECTIONS = {'all': core.DEFAULT_SELECTION, 'narrow': NARROW_SELECTION}
+# Outlines inline at full and default detail, or by static URL
+OUTLINES = {
+    'inline-full': lambda: geometry.district_geojson('Full'),
+    'inline-default': lambda: geometry.district_geojson(),
+    'url': lambda: geometry.static_url(),
+}
+
+
+def bench_montreal_load(benchmark):
+    """What the app's cached loader pays once: read the results and build the ``Dataset``."""
+    def cold():
+        core._dataset = None
+        return (), {}
+
+    benchmark.pedantic(core.load, setup=cold, rounds=20)
+
+
+@pytest.mark.parametrize('name', SELECTIONS)
+def bench_montreal_derive(benchmark, name):
+    benchmark(core.derive, SELECTIONS[name], core.load())
+
+
+@pytest.mark.parametrize('name', SELECTIONS)
+def bench_montreal_summarise(benchmark, name):
+    benchmark(core.summarise, SELECTIONS[name], core.load())
+
+
+@pytest.mark.parametrize('kind', core.FIGURE_KINDS)
+def bench_montreal_figure(benchmark, kind):
+    benchmark(core.build_figures, core.DEFAULT_SELECTION, (kind,), core.load())
+
+
+@pytest.mark.parametrize('kind', core.FIGURE_KINDS)
+def bench_montreal_serialise(benchmark, kind):
+    fig = core.build_figures(core.DEFAULT_SELECTION, (kind,), core.load())[kind]
+    spec = benchmark(pio.to_json, fig, validate=False)
+    raw = spec.encode('utf-8')
+    benchmark.extra_info['bytes'] = len(raw)
+    benchmark.extra_info['gzip_bytes'] = len(gzip.compress(raw))
+
+
+@pytest.mark.parametrize('detail', geometry.DETAIL_LEVELS)
+def bench_montreal_simplify(benchmark, detail):
+    raw = px.data.election_geojson()
+    outlines = benchmark(geometry.simplify_geojson, raw, geometry.DETAIL_LEVELS[detail])
+    benchmark.extra_info['bytes'] = len(json.dumps(outlines, separators=(',', ':')).encode('utf-8'))
+
+
+@pytest.mark.parametrize('outlines', OUTLINES)
+@pytest.mark.parametrize('metric', core.MAP_METRICS)
+def bench_montreal_map(benchmark, metric, outlines):
+    benchmark(core.build_map, core.DEFAULT_SELECTION, metric, OUTLINES[outlines](), core.load())
+
+
+@pytest.mark.parametrize('outlines', OUTLINES)
+@pytest.mark.parametrize('metric', core.MAP_METRICS)
+def bench_montreal_map_serialise(benchmark, metric, outlines):
+    fig = core.build_map(core.DEFAULT_SELECTION, metric, OUTLINES[outlines](), core.load())
+    spec = benchmark(pio.to_json, fig, validate=False)
+    raw = spec.encode('utf-8')
+    benchmark.extra_info['bytes'] = len(raw)
+    benchmark.extra_info['gzip_bytes'] = len(gzip.compress(raw))
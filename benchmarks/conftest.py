@@ -0,0 +1,72 @@
+"""Fixtures for the benchmark suite.
+
+Run from the repository root (``pip install -r benchmarks/requirements.txt``)::
+
+    python -m pytest benchmarks                          # bundled grid, 10x and 100x
+    python -m pytest benchmarks --grid-scale=1,1000      # pick the grid sizes
+    python -m pytest benchmarks -k montreal              # one app only
+
+Every run is saved as JSON under ``.benchmarks/`` (``--benchmark-autosave``),
+named after the current commit.  Compare two runs with::
+
+    pytest-benchmark compare 0001 0002 --group-by=name
+
+or fail a run that regresses against the last saved one with
+``--benchmark-compare --benchmark-compare-fail=mean:10%``.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from heatwave import core  # noqa: E402
+from heatwave.cache import load_columns  # noqa: E402
+from heatwave.schema import CSV_PATH  # noqa: E402
+from synthetic import write_synthetic_csv  # noqa: E402
+
+DEFAULT_SCALES = '1,10,100'
+
+
+def pytest_addoption(parser):
+    parser.addoption('--grid-scale', default=DEFAULT_SCALES,
+                     help='Comma-separated grid scale factors relative to the bundled CSV '
+                          f'(default {DEFAULT_SCALES}; 1000 is supported but slow to generate)')
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption('grid_scale').split(',') if s.strip()]
+        metafunc.parametrize('scale', scales, scope='session', ids=lambda s: f'x{s}')
+
+
+@pytest.fixture(scope='session')
+def grid_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp('grids')
+
+
+@pytest.fixture(scope='session')
+def grid_csv(scale, grid_dir):
+    """Path of the bundled CSV, or of a synthetic grid ``scale`` times finer."""
+    if scale == 1:
+        return CSV_PATH
+    columns, _ = load_columns(CSV_PATH, cache_dir=str(grid_dir / 'cache'))
+    return write_synthetic_csv(columns, scale, str(grid_dir))
+
+
+@pytest.fixture(scope='session')
+def cache_dir(grid_dir):
+    return str(grid_dir / 'cache')
+
+
+@pytest.fixture(scope='session')
+def dataset(grid_csv, cache_dir):
+    return core.load(grid_csv, cache_dir=cache_dir)
+
+
+@pytest.fixture
+def selection():
+    return core.DEFAULT_SELECTION
@@ -0,0 +1,53 @@
+"""The Plotly Express map construction the dashboard used before theme.py.
+
+Kept as a reference point for the figure benchmarks.
+"""
+
+import numpy as np
+import plotly.express as px
+
+from heatwave.schema import baseline_column, scenario_column
+
+
+def build_map_figure_px(kind, store, cube, scenario, confidence, baseline):
+    """Build one dashboard map with Plotly Express, as the original script did."""
+    scenario_col = scenario_column(scenario, confidence)
+    baseline_col = baseline_column(baseline, confidence)
+    change = cube.change_for(scenario, confidence, baseline)
+    change_pct = cube.change_pct_for(scenario, confidence, baseline)
+    df = store.frame(['Latitude', 'Longitude', baseline_col, scenario_col],
+                     change=change, change_pct=change_pct)
+    common = dict(lat='Latitude', lon='Longitude', mapbox_style='carto-darkmatter', zoom=4.5,
+                  center={'lat': 54, 'lon': -2}, height=550)
+    position = {'Latitude': ':.2f', 'Longitude': ':.2f'}
+    if kind == 'projected':
+        fig = px.scatter_mapbox(df, color=scenario_col, size=scenario_col, color_continuous_scale='Hot',
+                                hover_data={**position, scenario_col: ':.1f', baseline_col: ':.1f'}, **common)
+    elif kind == 'baseline':
+        fig = px.scatter_mapbox(df, color=baseline_col, size=baseline_col, color_continuous_scale='Blues',
+                                hover_data={**position, baseline_col: ':.1f'}, **common)
+    elif kind == 'change':
+        fig = px.scatter_mapbox(df, color='change', size=np.abs(change) + 0.1, color_continuous_scale='RdYlBu_r',
+                                hover_data={**position, 'change': ':.1f', scenario_col: ':.1f',
+                                            baseline_col: ':.1f'}, **common)
+    elif kind == 'density':
+        fig = px.density_mapbox(df, z=scenario_col, radius=15, color_continuous_scale='Hot', **common)
+    else:
+        keep = change_pct < 1000
+        fig = px.scatter_mapbox(df[keep], color='change_pct', size=np.abs(change_pct[keep]) + 1,
+                                color_continuous_scale='Plasma',
+                                hover_data={**position, 'change_pct': ':.0f', scenario_col: ':.1f',
+                                            baseline_col: ':.1f'}, **common)
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=12),
+        title_x=0.5,
+        title_font=dict(size=16, color='white'),
+        coloraxis_colorbar=dict(
+            title=dict(text='Hot Days/Year', font=dict(color='white', size=12)),
+            tickfont=dict(color='white')
+        ),
+        margin=dict(l=0, r=0, t=40, b=0)
+    )
+    return fig
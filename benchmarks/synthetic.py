@@ -0,0 +1,71 @@
+"""Synthetic grids at multiples of the bundled CSV's resolution.
+
+Each 12 km cell is split into ``k x k`` sub-cells on a finer lattice
+(``k = round(sqrt(factor))``, so 10x is really 9x and 1000x is 1024x).
+Longitude/latitude come from the grid's own fitted projection, and sub-cells
+inherit their parent's HSD values plus a little deterministic noise.  The
+result goes through exactly the same code paths as a real higher-resolution
+export, including the regular-lattice checks.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from heatwave.grid import RegularGrid
+from heatwave.projection import GridProjection
+from heatwave.schema import is_hsd_column
+
+
+def subdivision(factor):
+    """Sub-cells per side used for a requested scale factor."""
+    return max(1, int(round(np.sqrt(factor))))
+
+
+def synthetic_frame(columns, factor, seed=0):
+    """DataFrame of a grid refined by about ``factor`` from ``columns``."""
+    k = subdivision(factor)
+    x = np.asarray(columns['Projection_x_coordinate'], dtype=np.float64)
+    y = np.asarray(columns['Projection_y_coordinate'], dtype=np.float64)
+    grid = RegularGrid(x, y)
+    projection = GridProjection(columns['Latitude'], columns['Longitude'], x, y)
+
+    offsets = (np.arange(k) + 0.5) / k - 0.5
+    sub_x = (x[:, None, None] + offsets[None, None, :] * grid.dx).repeat(k, axis=1).ravel()
+    sub_y = (y[:, None, None] + offsets[None, :, None] * grid.dy).repeat(k, axis=2).ravel()
+    parent = np.repeat(np.arange(x.size), k * k)
+    latitude, longitude = projection.inverse(sub_x, sub_y)
+
+    rng = np.random.default_rng(seed)
+    data = {}
+    for name, values in columns.items():
+        values = np.asarray(values)
+        if name == 'OBJECTID':
+            data[name] = np.arange(1, parent.size + 1)
+        elif name == 'Latitude':
+            data[name] = np.round(latitude, 5)
+        elif name == 'Longitude':
+            data[name] = np.round(longitude, 5)
+        elif name == 'Projection_x_coordinate':
+            data[name] = np.round(sub_x, 3)
+        elif name == 'Projection_y_coordinate':
+            data[name] = np.round(sub_y, 3)
+        elif name == 'Shape__Area':
+            data[name] = values[parent] / (k * k)
+        elif name == 'Shape__Length':
+            data[name] = values[parent] / k
+        elif is_hsd_column(name):
+            noisy = values[parent].astype(np.float64) + rng.normal(0, 0.2, parent.size)
+            data[name] = np.round(np.clip(noisy, 0, None), 1)
+        else:
+            data[name] = values[parent]
+    return pd.DataFrame(data)
+
+
+def write_synthetic_csv(columns, factor, directory):
+    """Write a synthetic grid CSV into ``directory`` and return its path."""
+    path = os.path.join(directory, f'synthetic_x{factor}.csv')
+    if not os.path.exists(path):
+        synthetic_frame(columns, factor).to_csv(path, index=False)
+    return path
@@ -0,0 +1 @@
+"""Data and compute helpers for the UK heatwave dashboard."""
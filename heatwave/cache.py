@@ -0,0 +1,98 @@
+"""Columnar binary cache for the gridded CSV exports.
+
+The CSV is parsed once and written to ``<cache dir>/<content hash>/`` as one
+``.npy`` file per column (HSD columns as float32).  Later loads memory-map
+those files, so restarts and worker processes share the same pages instead of
+re-parsing text.  Editing the CSV changes its hash, which triggers a rebuild.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .schema import is_hsd_column
+
+CACHE_DIR = os.environ.get(
+    'HEATWAVE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'grids')
+)
+FORMAT_VERSION = 1
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Return a hex digest of the file contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _column_dtype(name, values):
+    if is_hsd_column(name):
+        return np.float32
+    return values.dtype
+
+
+def _build(csv_path, target):
+    df = pd.read_csv(csv_path, encoding='utf-8-sig')
+
+    # Write into a scratch directory and rename it into place, so a reader in
+    # another process never sees a half-written cache.
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix='.build-', dir=os.path.dirname(target))
+    try:
+        files = []
+        for i, name in enumerate(df.columns):
+            values = df[name].to_numpy()
+            filename = f'{i:03d}.npy'
+            np.save(os.path.join(scratch, filename), values.astype(_column_dtype(name, values), copy=False))
+            files.append({'name': name, 'file': filename})
+        meta = {'version': FORMAT_VERSION, 'source': os.path.basename(csv_path), 'rows': len(df), 'columns': files}
+        with open(os.path.join(scratch, 'meta.json'), 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh, ensure_ascii=False)
+        try:
+            os.rename(scratch, target)
+        except OSError:
+            # Another process finished the same build first
+            if not os.path.exists(os.path.join(target, 'meta.json')):
+                raise
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _read(target):
+    with open(os.path.join(target, 'meta.json'), encoding='utf-8') as fh:
+        meta = json.load(fh)
+    if meta.get('version') != FORMAT_VERSION:
+        return None
+    return {
+        col['name']: np.load(os.path.join(target, col['file']), mmap_mode='r')
+        for col in meta['columns']
+    }
+
+
+def load_columns(csv_path, cache_dir=None):
+    """Return ``(columns, version)`` for a gridded CSV.
+
+    ``columns`` maps each CSV column name to a read-only, memory-mapped array
+    in the original column order; ``version`` is the CSV content hash and can be
+    used to key anything derived from the data.
+    """
+    version = file_hash(csv_path)
+    target = os.path.join(cache_dir or CACHE_DIR, version)
+
+    columns = None
+    if os.path.exists(os.path.join(target, 'meta.json')):
+        columns = _read(target)
+    if columns is None:
+        shutil.rmtree(target, ignore_errors=True)
+        _build(csv_path, target)
+        columns = _read(target)
+    return columns, version
+
@@ -0,0 +1,415 @@
+"""Headless entry points for the heatwave dashboard.
+
+Everything the dashboard computes is reachable from four plain functions, so
+the hot paths can be benchmarked, profiled or run from a batch job without a
+Streamlit server::
+
+    from heatwave import core
+
+    data = core.load()
+    selection = core.Selection('2.5°C', 'median', '1981-2000')
+    core.summarise(selection)['increase']
+    figures = core.build_figures(selection)
+
+``Selection.scenario`` is a scenario label or a numeric warming level such
+as 2.7, which is interpolated between the modelled scenarios (see
+``warming``).
+
+Each function takes an optional ``data`` argument (the result of ``load``)
+and falls back to the default dataset, loaded once per process and again
+only if the CSV changes.
+"""
+
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .cache import load_columns
+from .cube import ScenarioCube
+from .figures import (
+    MAP_KINDS, FigureCache, build_crossing_figure, build_map_figure, build_region_figure, build_scenario_figure,
+    build_spread_figure, default_backend,
+)
+from .lookup import CellLocator
+from .ranking import extreme_indices, load_ranking
+from .regions import RegionIndex, region_column_means
+from .schema import CONFIDENCE_LEVELS, CSV_PATH, WARMING_SCENARIOS, baseline_column, scenario_column
+from .spread import SPREAD_METRICS, EnsembleSpread, band_spread
+from .store import DerivedBuffer, GridStore
+from .summary import load_summary
+from .table import PAGE_SIZE, SortIndex, arrow_page, page_count, page_rows
+from .warming import WarmingCurve, scenario_label
+from .weights import area_weights, load_weighted_summary, weighted_quantiles
+
+Selection = namedtuple('Selection', ['scenario', 'confidence', 'baseline'])
+
+DEFAULT_SELECTION = Selection('2.5°C', 'median', '1981-2000')
+
+CHART_KINDS = ('scenarios', 'regions')
+FIGURE_KINDS = MAP_KINDS + CHART_KINDS + ('crossing', 'spread')
+
+DEFAULT_THRESHOLD = 10
+
+
+class Dataset:
+    """Everything derived once per data version and shared across selections."""
+
+    def __init__(self, store, figure_cache=None):
+        self.store = store
+        self.version = store.version
+        self.weights = area_weights(store)
+        self.cube = ScenarioCube(store, self.weights)
+        self.summary = load_summary(store)
+        self.weighted_summary = load_weighted_summary(store, self.weights)
+        self.ranking = load_ranking(store, self.cube)
+        self.figures = figure_cache or FigureCache(max_entries=64, max_bytes=64 * 1024 * 1024)
+        self.backend = default_backend(store)
+        self.warming = WarmingCurve(store)
+        self.sort_index = SortIndex()
+        self._locator = None
+        self._spread = None
+        self._region_means = {}
+        self._levels = OrderedDict()
+        self._levels_lock = threading.Lock()
+
+    @property
+    def locator(self):
+        """``CellLocator`` for point lookups, built on first use."""
+        if self._locator is None:
+            self._locator = CellLocator(self.store)
+        return self._locator
+
+    @property
+    def spread(self):
+        """``EnsembleSpread`` for every scenario and baseline, built on first use."""
+        if self._spread is None:
+            self._spread = EnsembleSpread(self.cube, self.weights)
+        return self._spread
+
+    def region_means(self, boundary_path, weighted=True):
+        """Per-region means of every HSD column for one boundary file."""
+        key = (boundary_path, weighted)
+        means = self._region_means.get(key)
+        if means is None:
+            index = RegionIndex(self.store, boundary_path)
+            weights = self.weights if weighted else None
+            means = self._region_means[key] = region_column_means(self.store, index, weights)
+        return means
+
+    def at_level(self, level, confidence, baseline):
+        """Projected, change and percentage change per cell at a warming level.
+
+        The most recent few levels are kept, so one rerun computes them once.
+        """
+        key = (level, confidence, baseline)
+        with self._levels_lock:
+            arrays = self._levels.get(key)
+            if arrays is not None:
+                self._levels.move_to_end(key)
+                return arrays
+
+        projected = self.warming.at(level, confidence)
+        base = np.asarray(self.store.column(baseline_column(baseline, confidence)), dtype=np.float32)
+        change = projected - base
+        # Same formula as ScenarioCube.change_pct
+        change_pct = change / (base + 0.001) * 100
+        for arr in (projected, change, change_pct):
+            arr.flags.writeable = False
+
+        with self._levels_lock:
+            arrays = self._levels.setdefault(key, (projected, change, change_pct))
+            while len(self._levels) > 8:
+                self._levels.popitem(last=False)
+        return arrays
+
+
+_datasets = {}
+# (csv path, cache dir) -> ((mtime, size), Dataset) of the last load
+_loaded = {}
+
+
+def load(csv_path=CSV_PATH, cache_dir=None):
+    """Load the gridded data (via the columnar cache) as a ``Dataset``.
+
+    The CSV is only re-hashed when its modification time or size changes, so
+    repeated calls return the loaded ``Dataset`` for the cost of one ``stat``.
+    """
+    key = (os.path.abspath(csv_path), cache_dir)
+    stat = os.stat(csv_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded[0] == signature:
+        return loaded[1]
+
+    columns, version = load_columns(csv_path, cache_dir)
+    data = _datasets.get(version)
+    if data is None:
+        data = _datasets[version] = Dataset(GridStore(columns, version))
+    _loaded[key] = (signature, data)
+    return data
+
+
+def _data(data):
+    return load() if data is None else data
+
+
+def _modelled(selection):
+    return isinstance(selection.scenario, str)
+
+
+def derive(selection, data=None):
+    """Selection-dependent per-cell arrays and a zero-copy frame over them."""
+    data = _data(data)
+    scenario_col = scenario_column(scenario_label(selection.scenario), selection.confidence)
+    baseline_col = baseline_column(selection.baseline, selection.confidence)
+    if _modelled(selection):
+        change = data.cube.change_for(*selection)
+        change_pct = data.cube.change_pct_for(*selection)
+        frame = data.store.frame(['Latitude', 'Longitude', baseline_col, scenario_col],
+                                 change=change, change_pct=change_pct)
+    else:
+        projected, change, change_pct = data.at_level(*selection)
+        frame = data.store.frame(['Latitude', 'Longitude', baseline_col],
+                                 **{scenario_col: projected, 'change': change, 'change_pct': change_pct})
+    return {
+        'scenario_col': scenario_col,
+        'baseline_col': baseline_col,
+        'change': change,
+        'change_pct': change_pct,
+        'frame': frame,
+    }
+
+
+def summarise(selection, data=None, weighted=True):
+    """Headline numbers and the scenario table for one selection.
+
+    Means, percentiles and the median change are area-weighted (see
+    ``weights``) unless ``weighted`` is false.
+    """
+    data = _data(data)
+    summary = data.weighted_summary if weighted else data.summary
+    baseline_col = baseline_column(selection.baseline, selection.confidence)
+    scenarios = summary.loc[[scenario_column(s, selection.confidence) for s in WARMING_SCENARIOS]].copy()
+    scenarios.insert(0, 'Scenario', WARMING_SCENARIOS)
+
+    current_avg = float(summary.at[baseline_col, 'mean'])
+    if _modelled(selection):
+        scenario_col = scenario_column(selection.scenario, selection.confidence)
+        future_avg = float(summary.at[scenario_col, 'mean'])
+        max_projected, *max_projected_location = data.ranking.first(scenario_col)
+        max_change, *max_change_location = data.ranking.first('change', selection=selection)
+        median_change = data.cube.stats(*selection)['weighted_median_change' if weighted else 'median_change']
+    else:
+        # The grid mean is linear in the cell values, so it blends like them
+        future_avg = float(data.warming.blend(scenarios['mean'].to_numpy(), selection.scenario))
+        projected, change, _ = data.at_level(*selection)
+        max_projected, *max_projected_location = _first(data, projected)
+        max_change, *max_change_location = _first(data, change)
+        if weighted:
+            median_change = float(weighted_quantiles(change, data.weights, [0.5])[0])
+        else:
+            median_change = float(np.median(change))
+    increase = future_avg - current_avg
+
+    return {
+        'current_avg': current_avg,
+        'future_avg': future_avg,
+        'increase': increase,
+        'increase_pct': increase / (current_avg + 0.001) * 100,
+        'max_projected': max_projected,
+        'max_projected_location': tuple(max_projected_location),
+        'max_change': max_change,
+        'max_change_location': tuple(max_change_location),
+        'median_change': median_change,
+        'scenarios': scenarios,
+    }
+
+
+def regions(selection, boundary_path, data=None, weighted=True):
+    """Baseline, projected and change per region for one boundary file.
+
+    Region means are area-weighted unless ``weighted`` is false.
+    """
+    data = _data(data)
+    means = data.region_means(boundary_path, weighted)
+    baseline = means[baseline_column(selection.baseline, selection.confidence)].to_numpy()
+    if _modelled(selection):
+        projected = means[scenario_column(selection.scenario, selection.confidence)].to_numpy()
+    else:
+        by_scenario = means[[scenario_column(s, selection.confidence) for s in WARMING_SCENARIOS]].to_numpy().T
+        projected = data.warming.blend(by_scenario, selection.scenario)
+    return pd.DataFrame({
+        'Region': means.index,
+        'Baseline': baseline,
+        'Projected': projected,
+        'Change': projected - baseline,
+    })
+
+
+def crossing(threshold, confidence, data=None):
+    """Warming level at which each cell reaches ``threshold`` hot days/year.
+
+    Returns the per-cell levels (NaN where 4°C falls short) and the share of
+    the grid that has reached the threshold by each modelled scenario.
+    """
+    data = _data(data)
+    levels = data.warming.crossing(threshold, confidence)
+    reached = np.nan_to_num(levels, nan=np.inf)[None, :] <= data.warming.levels[:, None]
+    return {
+        'crossing': levels,
+        'reached': pd.DataFrame({
+            'Scenario': WARMING_SCENARIOS,
+            'Share of grid (%)': reached.mean(axis=1) * 100,
+        }),
+    }
+
+
+def spread(selection, data=None):
+    """Uncertainty between the lower, median and upper projections.
+
+    Returns per-cell ``spread``, ``relative`` spread and ``agreement`` for
+    the selection's scenario and baseline (whatever its confidence level),
+    the median ``change``, and the area-weighted per-scenario ``table``.
+    """
+    data = _data(data)
+    scenario, _, baseline = selection
+    if _modelled(selection):
+        arrays = data.spread.arrays(scenario, baseline)
+        change = data.cube.change_for(scenario, 'median', baseline)
+    else:
+        by_band = np.stack([data.at_level(scenario, c, baseline)[1] for c in CONFIDENCE_LEVELS])
+        arrays = band_spread(by_band)
+        change = by_band[CONFIDENCE_LEVELS.index('median')]
+    return dict(zip(('spread', 'relative', 'agreement'), arrays), change=change,
+                table=data.spread.table(baseline))
+
+
+def build_figures(selection, kinds=MAP_KINDS + ('scenarios',), data=None, buffer=None,
+                  boundary_path=None, threshold=None, spread_metric='spread'):
+    """Build the requested figures for one selection, keyed by kind.
+
+    Map kinds, ``'crossing'`` and ``'spread'`` go through the dataset's
+    ``FigureCache``.  ``'regions'`` also needs ``boundary_path``,
+    ``'crossing'`` a hot-day ``threshold`` and ``'spread'`` one of
+    ``SPREAD_METRICS``.  ``buffer`` is an optional per-caller
+    ``DerivedBuffer`` for map scratch arrays.
+    """
+    data = _data(data)
+    store = data.store
+    built = {}
+    for kind in kinds:
+        if kind in MAP_KINDS:
+            if buffer is None:
+                buffer = DerivedBuffer(store.size)
+            key = (data.version,) + tuple(selection) + (kind, data.backend)
+            projected = None if _modelled(selection) else data.at_level(*selection)[0]
+            built[kind] = data.figures.figure(key, lambda: build_map_figure(
+                kind, store, data.cube, *selection, buffer=buffer, backend=data.backend, projected=projected))
+        elif kind == 'crossing':
+            if threshold is None:
+                raise ValueError("The 'crossing' figure needs a threshold")
+            if buffer is None:
+                buffer = DerivedBuffer(store.size)
+            # Depends on the threshold and confidence only, not the scenario
+            key = (data.version, 'crossing', float(threshold), selection.confidence, data.backend)
+            built[kind] = data.figures.figure(key, lambda: build_crossing_figure(
+                store, data.warming.crossing(threshold, selection.confidence), threshold,
+                selection.confidence, buffer=buffer, backend=data.backend))
+        elif kind == 'spread':
+            if spread_metric not in SPREAD_METRICS:
+                raise ValueError(f'Unknown spread metric: {spread_metric!r}')
+            if buffer is None:
+                buffer = DerivedBuffer(store.size)
+            # Covers all three confidence levels, so the selected one is not in the key
+            key = (data.version, 'spread', spread_metric, selection.scenario, selection.baseline, data.backend)
+            built[kind] = data.figures.figure(key, lambda: build_spread_figure(
+                spread_metric, store, spread(selection, data), selection.scenario, selection.baseline,
+                buffer=buffer, backend=data.backend))
+        elif kind == 'scenarios':
+            built[kind] = build_scenario_figure(summarise(selection, data)['scenarios'])
+        elif kind == 'regions':
+            if boundary_path is None:
+                raise ValueError("The 'regions' figure needs a boundary_path")
+            built[kind] = build_region_figure(regions(selection, boundary_path, data),
+                                              scenario_label(selection.scenario))
+        else:
+            raise ValueError(f'Unknown figure kind: {kind!r}')
+    return built
+
+
+TABLE_COLUMNS = ('Latitude', 'Longitude', 'baseline', 'projected', 'change', 'change_pct')
+
+
+def table_page(selection, sort_by='projected', descending=True, page=0, page_size=PAGE_SIZE,
+               latitude=None, data=None):
+    """One page of the per-cell data table, sorted and filtered on the server.
+
+    ``sort_by`` is one of ``TABLE_COLUMNS``, where ``'baseline'`` and
+    ``'projected'`` stand for the selection's columns.  ``latitude`` is an
+    optional (south, north) filter and ``page`` is clamped to the last
+    page.  Returns the page as an Arrow table (``rows``), the ``page``
+    shown, the ``pages`` and ``total`` rows after filtering, and the
+    ``scenario_col`` with its grid maximum as ``scale`` for a colour bar.
+    """
+    data = _data(data)
+    if sort_by not in TABLE_COLUMNS:
+        raise ValueError(f'Unknown table column: {sort_by!r}')
+    derived = derive(selection, data)
+    frame = derived['frame']
+    names = dict(zip(TABLE_COLUMNS, ['Latitude', 'Longitude', derived['baseline_col'], derived['scenario_col'],
+                                     'change', 'change_pct']))
+    columns = {name: frame[name].to_numpy() for name in names.values()}
+
+    name = names[sort_by]
+    # Stored columns sort the same for every selection; derived ones don't
+    key = name if name in data.store.names else (name,) + tuple(selection)
+    order = data.sort_index.order(key, columns[name], descending)
+    keep = None
+    if latitude is not None:
+        south, north = latitude
+        lat = columns['Latitude']
+        keep = (lat >= south) & (lat <= north)
+
+    rows, page, total = page_rows(order, page, page_size, keep)
+    return {
+        'rows': arrow_page(columns, rows),
+        'page': page,
+        'pages': page_count(total, page_size),
+        'total': total,
+        'scenario_col': derived['scenario_col'],
+        'scale': float(columns[derived['scenario_col']].max()),
+    }
+
+
+def _first(data, values):
+    i = int(np.argmax(values))
+    return float(values[i]), float(data.ranking.latitude[i]), float(data.ranking.longitude[i])
+
+
+def top_cells(selection, column='projected', k=10, data=None):
+    """The ``k`` cells with the most projected hot days, or the largest change.
+
+    ``column`` is ``'projected'`` or ``'change'``.  Modelled scenarios slice
+    the precomputed ranking; warming levels rank the interpolated grid.
+    """
+    data = _data(data)
+    if column not in ('projected', 'change'):
+        raise ValueError(f'Unknown ranking column: {column!r}')
+    if column == 'projected':
+        name = scenario_column(scenario_label(selection.scenario), selection.confidence)
+    else:
+        name = 'change'
+    if _modelled(selection):
+        return data.ranking.table(name, k=k, selection=selection if column == 'change' else None)
+    projected, change, _ = data.at_level(*selection)
+    values = projected if column == 'projected' else change
+    index = extreme_indices(values, k)
+    return pd.DataFrame({
+        'Rank': np.arange(1, len(index) + 1),
+        'Latitude': data.ranking.latitude[index],
+        'Longitude': data.ranking.longitude[index],
+        name: values[index],
+    }, index=pd.Index(index, name='cell'))
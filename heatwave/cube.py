@@ -0,0 +1,77 @@
+"""Precomputed scenario x confidence x baseline cube.
+
+There are only 5 x 3 x 2 = 30 filter combinations, so every derived column and
+per-selection statistic the dashboard shows is computed for all of them in one
+vectorized pass at load time.  A selection is then a dictionary read.
+"""
+
+import numpy as np
+
+from .schema import BASELINES, CONFIDENCE_LEVELS, WARMING_SCENARIOS, baseline_column, scenario_column
+from .weights import weighted_quantiles
+
+
+class ScenarioCube:
+    """Derived arrays and summary statistics for every filter combination.
+
+    Axis order is (confidence, scenario, baseline, cell) throughout.  With
+    per-cell ``weights`` the statistics include area-weighted medians too.
+    """
+
+    def __init__(self, columns, weights=None):
+        self.latitude = np.asarray(columns['Latitude'])
+        self.longitude = np.asarray(columns['Longitude'])
+
+        projected = np.stack([
+            np.stack([columns[scenario_column(s, c)] for s in WARMING_SCENARIOS])
+            for c in CONFIDENCE_LEVELS
+        ]).astype(np.float32)
+        base = np.stack([
+            np.stack([columns[baseline_column(b, c)] for b in BASELINES])
+            for c in CONFIDENCE_LEVELS
+        ]).astype(np.float32)
+
+        # (confidence, scenario, baseline, cell)
+        self.change = projected[:, :, None, :] - base[:, None, :, :]
+        self.change_pct = self.change / (base[:, None, :, :] + 0.001) * 100
+        for arr in (self.change, self.change_pct):
+            arr.flags.writeable = False
+
+        change_median = np.median(self.change, axis=-1)
+        if weights is not None:
+            # All 30 selections as columns of one (cell, selection) block
+            flat = self.change.reshape(-1, self.change.shape[-1]).T
+            weighted_median = weighted_quantiles(flat, weights, [0.5])[0].reshape(change_median.shape)
+
+        self.index = {
+            'scenario': {s: i for i, s in enumerate(WARMING_SCENARIOS)},
+            'confidence': {c: i for i, c in enumerate(CONFIDENCE_LEVELS)},
+            'baseline': {b: i for i, b in enumerate(BASELINES)},
+        }
+
+        self._table = {}
+        for c, confidence in enumerate(CONFIDENCE_LEVELS):
+            for s, scenario in enumerate(WARMING_SCENARIOS):
+                for b, baseline in enumerate(BASELINES):
+                    stats = self._table[scenario, confidence, baseline] = {
+                        'median_change': float(change_median[c, s, b]),
+                    }
+                    if weights is not None:
+                        stats['weighted_median_change'] = float(weighted_median[c, s, b])
+
+    def _position(self, scenario, confidence, baseline):
+        return (self.index['confidence'][confidence],
+                self.index['scenario'][scenario],
+                self.index['baseline'][baseline])
+
+    def stats(self, scenario, confidence, baseline):
+        """Headline statistics for one selection."""
+        return self._table[scenario, confidence, baseline]
+
+    def change_for(self, scenario, confidence, baseline):
+        """Read-only view of projected minus baseline hot days per cell."""
+        return self.change[self._position(scenario, confidence, baseline)]
+
+    def change_pct_for(self, scenario, confidence, baseline):
+        """Read-only view of the percentage change per cell."""
+        return self.change_pct[self._position(scenario, confidence, baseline)]
@@ -0,0 +1,55 @@
+"""Compact array encoding for map traces.
+
+Plotly (6+) serialises numpy arrays as typed base64 buffers, so the dtype we
+hand it decides the bytes on the wire.  In ``'compact'`` mode coordinates are
+rounded to the precision the grid resolves and everything is sent as float32;
+``'plain'`` keeps the float64 arrays for comparison.
+"""
+
+import math
+
+import numpy as np
+
+ENCODINGS = ('compact', 'plain')
+
+METRES_PER_DEGREE = 111_320
+
+
+def grid_cell_size(store):
+    """Lattice spacing in metres, from the projection x coordinates."""
+    xs = np.unique(np.asarray(store.column('Projection_x_coordinate')))
+    if xs.size < 2:
+        return float('nan')
+    return float(np.min(np.diff(xs)))
+
+
+def coordinate_decimals(cell_size_m):
+    """Decimal places that resolve a tenth of a grid cell in degrees."""
+    if not cell_size_m > 0:
+        return 6
+    return max(0, math.ceil(-math.log10(cell_size_m / METRES_PER_DEGREE / 10)))
+
+
+class MapEncoder:
+    """Encodes coordinates (once per store) and value arrays for map traces."""
+
+    def __init__(self, store, encoding='compact'):
+        if encoding not in ENCODINGS:
+            raise ValueError(f'Unknown encoding: {encoding!r}')
+        self.encoding = encoding
+        lat = np.asarray(store.column('Latitude'))
+        lon = np.asarray(store.column('Longitude'))
+        if encoding == 'compact':
+            self.decimals = coordinate_decimals(grid_cell_size(store))
+            lat = np.round(lat, self.decimals).astype(np.float32)
+            lon = np.round(lon, self.decimals).astype(np.float32)
+        else:
+            self.decimals = None
+        lat.flags.writeable = False
+        lon.flags.writeable = False
+        self.lat = lat
+        self.lon = lon
+
+    def values(self, values):
+        dtype = np.float32 if self.encoding == 'compact' else np.float64
+        return np.asarray(values).astype(dtype, copy=False)
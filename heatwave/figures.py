@@ -0,0 +1,502 @@
+"""Map and chart figure construction and a bounded cache of serialised figures.
+
+Building a mapbox figure and serialising it dominates a rerun, yet the result
+only depends on the selection.  ``FigureCache`` keeps the JSON for recently
+used (scenario, confidence, baseline, kind) keys so a repeat selection skips
+both steps.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from .encoding import MapEncoder
+from .schema import baseline_column, scenario_column
+from .store import DerivedBuffer
+from .raster import Rasteriser
+from .theme import TEMPLATE_NAME, density_map, hover_template, raster_map, scatter_map
+from .warming import WARMING_LEVELS, scenario_label
+
+MAP_KINDS = ('projected', 'baseline', 'change', 'density', 'change_pct')
+MAP_BACKENDS = ('scatter', 'raster')
+
+
+_encoders = {}
+
+
+def map_encoder(store, encoding='compact'):
+    """Shared ``MapEncoder`` per data version, so coordinates are encoded once."""
+    key = (store.version, encoding)
+    encoder = _encoders.get(key)
+    if encoder is None:
+        encoder = _encoders[key] = MapEncoder(store, encoding)
+    return encoder
+
+
+# Above this many cells scatter markers get too heavy for the browser
+RASTER_THRESHOLD = 20_000
+
+
+def default_backend(store):
+    """``HEATWAVE_MAP_BACKEND`` if set, otherwise chosen from the grid size."""
+    backend = os.environ.get('HEATWAVE_MAP_BACKEND')
+    if backend:
+        return backend
+    return 'raster' if store.size > RASTER_THRESHOLD else 'scatter'
+
+
+_rasterisers = {}
+
+
+def map_rasteriser(store):
+    """Shared ``Rasteriser`` per data version; its pixel lookup is built once."""
+    rasteriser = _rasterisers.get(store.version)
+    if rasteriser is None:
+        rasteriser = _rasterisers[store.version] = Rasteriser(store)
+    return rasteriser
+
+
+def _map_spec(kind, store, cube, encoder, buffer, scenario, confidence, baseline, projected=None):
+    """What a map shows, independent of how it is drawn."""
+    values = encoder.values
+    scenario_col = scenario_column(scenario_label(scenario), confidence)
+    baseline_col = baseline_column(baseline, confidence)
+    modelled = projected is None
+    projected = values(store.column(scenario_col) if modelled else projected)
+    base = values(store.column(baseline_col))
+    position = [('Latitude', 'lat', '.2f'), ('Longitude', 'lon', '.2f')]
+
+    if kind == 'projected':
+        return dict(
+            key=scenario_col,
+            color=projected,
+            size=projected,
+            title=f'<b>Projected Hot Days: {scenario_label(scenario)} Warming ({confidence})</b>',
+            colorscale='Hot',
+            colorbar_title='Hot Days/Year',
+            customdata=base[:, None],
+            hover=position + [
+                (scenario_col, 'marker.color', '.1f'),
+                (baseline_col, 'customdata[0]', '.1f'),
+            ]
+        )
+
+    if kind == 'baseline':
+        return dict(
+            key=baseline_col,
+            color=base,
+            size=base,
+            title=f'<b>Baseline Hot Days: {baseline}</b>',
+            colorscale='Blues',
+            colorbar_title='Hot Days/Year',
+            hover=position + [(baseline_col, 'marker.color', '.1f')]
+        )
+
+    if kind == 'change':
+        if modelled:
+            change = values(cube.change_for(scenario, confidence, baseline))
+        else:
+            change = np.subtract(projected, base, out=buffer.slot('level_change'))
+        return dict(
+            key=('change', scenario_col, baseline_col),
+            color=change,
+            size=buffer.abs_plus('change_size', change, 0.1),
+            title=f'<b>Increase in Hot Days: {scenario_label(scenario)} vs Baseline</b>',
+            colorscale='RdYlBu_r',
+            colorbar_title='Change (days/year)',
+            customdata=np.column_stack([projected, base]),
+            hover=position + [
+                ('change', 'marker.color', '.1f'),
+                (scenario_col, 'customdata[0]', '.1f'),
+                (baseline_col, 'customdata[1]', '.1f'),
+            ]
+        )
+
+    if kind == 'density':
+        return dict(
+            key=scenario_col,
+            color=projected,
+            title=f'<b>Heat Intensity Map: {scenario_label(scenario)} Warming</b>',
+            colorscale='Hot',
+            colorbar_title='Hot Days/Year',
+            smooth=1,
+            hover=position + [(scenario_col, 'marker.color', '.1f')]
+        )
+
+    if kind == 'change_pct':
+        if modelled:
+            change_pct = values(cube.change_pct_for(scenario, confidence, baseline))
+        else:
+            change_pct = _percent_change(projected, base, buffer.slot('level_change_pct'))
+        return dict(
+            key=('change_pct', scenario_col, baseline_col),
+            color=change_pct,
+            size=buffer.abs_plus('change_pct_size', change_pct, 1),
+            # Filter out extreme outliers for better visualization
+            keep=change_pct < 1000,
+            title='<b>Percentage Increase in Hot Days</b>',
+            colorscale='Plasma',
+            colorbar_title='% Increase',
+            customdata=np.column_stack([projected, base]),
+            hover=position + [
+                ('change_pct', 'marker.color', '.0f'),
+                (scenario_col, 'customdata[0]', '.1f'),
+                (baseline_col, 'customdata[1]', '.1f'),
+            ]
+        )
+
+    raise ValueError(f'Unknown map kind: {kind!r}')
+
+
+def _percent_change(projected, base, out):
+    # Same formula as ScenarioCube.change_pct
+    np.subtract(projected, base, out=out)
+    out /= base + np.float32(0.001)
+    out *= 100
+    return out
+
+
+def _subset(array, index):
+    return None if array is None else array[index]
+
+
+def build_map_figure(kind, store, cube, scenario, confidence, baseline, buffer=None,
+                     encoding='compact', backend='scatter', projected=None):
+    """Build one of the five dashboard maps as a ``go.Figure``.
+
+    ``buffer`` is an optional per-session ``DerivedBuffer`` used as scratch
+    space for the marker-size arrays.  ``encoding`` is passed to
+    ``MapEncoder`` and decides how arrays are serialised.  ``backend`` is
+    ``'scatter'`` (one marker per cell) or ``'raster'`` (a server-rendered
+    image, for grids too large to ship as markers).  ``projected`` replaces
+    the scenario column with per-cell values, e.g. for an interpolated
+    warming level; ``scenario`` is then just the label.
+    """
+    if backend not in MAP_BACKENDS:
+        raise ValueError(f'Unknown map backend: {backend!r}')
+    if buffer is None:
+        buffer = DerivedBuffer(store.size)
+    encoder = map_encoder(store, encoding)
+    spec = _map_spec(kind, store, cube, encoder, buffer, scenario, confidence, baseline, projected)
+    return _draw_map(spec, store, encoder, backend, density=(kind == 'density'))
+
+
+def _crossing_spec(encoder, buffer, crossing, threshold, confidence):
+    crossing = encoder.values(crossing)
+    reached = ~np.isnan(crossing)
+    # Bigger markers where the threshold is reached at lower warming
+    size = np.subtract(WARMING_LEVELS[-1] + 0.5, crossing, out=buffer.slot('crossing_size'))
+    return dict(
+        key=('crossing', float(threshold), confidence),
+        color=crossing,
+        size=size,
+        keep=reached,
+        title=f'<b>Warming Level Reaching {threshold:g} Hot Days/Year ({confidence})</b>',
+        colorscale='YlOrRd_r',
+        colorbar_title='Warming (°C)',
+        hover=[('Latitude', 'lat', '.2f'), ('Longitude', 'lon', '.2f'),
+               (f'Reaches {threshold:g} days at', 'marker.color', '.2f')]
+    )
+
+
+def build_crossing_figure(store, crossing, threshold, confidence, buffer=None,
+                          encoding='compact', backend='scatter'):
+    """Map of the warming level at which each cell reaches ``threshold`` hot days.
+
+    ``crossing`` is the per-cell level from ``WarmingCurve.crossing``; cells
+    that never reach the threshold (NaN) are left off.
+    """
+    if backend not in MAP_BACKENDS:
+        raise ValueError(f'Unknown map backend: {backend!r}')
+    if buffer is None:
+        buffer = DerivedBuffer(store.size)
+    encoder = map_encoder(store, encoding)
+    spec = _crossing_spec(encoder, buffer, crossing, threshold, confidence)
+    return _draw_map(spec, store, encoder, backend)
+
+
+def _spread_spec(metric, encoder, buffer, spread, scenario, baseline):
+    values = encoder.values
+    label = scenario_label(scenario)
+    position = [('Latitude', 'lat', '.2f'), ('Longitude', 'lon', '.2f')]
+    customdata = np.column_stack([values(spread['change']), values(spread['spread']),
+                                  values(spread['relative'])])
+    hover = position + [
+        ('Median change', 'customdata[0]', '.1f'),
+        ('Spread (days)', 'customdata[1]', '.1f'),
+        ('Relative spread (%)', 'customdata[2]', '.0f'),
+    ]
+
+    if metric == 'spread':
+        color = values(spread['spread'])
+        return dict(
+            key=('spread', label, baseline),
+            color=color,
+            size=buffer.abs_plus('spread_size', color, 0.1),
+            title=f'<b>Uncertainty Spread: {label} vs {baseline} (upper - lower)</b>',
+            colorscale='Viridis',
+            colorbar_title='Spread (days/year)',
+            customdata=customdata,
+            hover=hover,
+        )
+
+    if metric == 'relative':
+        color = values(spread['relative'])
+        return dict(
+            key=('relative_spread', label, baseline),
+            color=color,
+            size=buffer.abs_plus('relative_spread_size', color, 1),
+            # Cells with next to no median change have unbounded relative spread
+            keep=color < 1000,
+            title=f'<b>Relative Spread: {label} vs {baseline} (% of median change)</b>',
+            colorscale='Magma',
+            colorbar_title='% of Change',
+            customdata=customdata,
+            hover=hover,
+        )
+
+    if metric == 'agreement':
+        color = values(spread['change'])
+        return dict(
+            key=('agreement', label, baseline),
+            color=color,
+            size=buffer.abs_plus('agreement_size', color, 0.1),
+            keep=np.asarray(spread['agreement']),
+            title=f'<b>Change Where Lower, Median and Upper Agree: {label}</b>',
+            colorscale='RdYlBu_r',
+            colorbar_title='Change (days/year)',
+            customdata=customdata,
+            hover=hover,
+        )
+
+    raise ValueError(f'Unknown spread metric: {metric!r}')
+
+
+def build_spread_figure(metric, store, spread, scenario, baseline, buffer=None,
+                        encoding='compact', backend='scatter'):
+    """Map of the uncertainty between the lower, median and upper projections.
+
+    ``metric`` is one of ``spread.SPREAD_METRICS``.  ``spread`` maps
+    ``'spread'``, ``'relative'``, ``'agreement'`` and the median ``'change'``
+    to per-cell arrays for one scenario and baseline; the agreement map only
+    shows cells where all three bands agree on the direction of change.
+    """
+    if backend not in MAP_BACKENDS:
+        raise ValueError(f'Unknown map backend: {backend!r}')
+    if buffer is None:
+        buffer = DerivedBuffer(store.size)
+    encoder = map_encoder(store, encoding)
+    spec = _spread_spec(metric, encoder, buffer, spread, scenario, baseline)
+    return _draw_map(spec, store, encoder, backend)
+
+
+def _draw_map(spec, store, encoder, backend, density=False):
+    """Draw a map spec as scatter markers, a density map or a raster overlay."""
+    keep = spec.get('keep')
+
+    if backend == 'raster':
+        rasteriser = map_rasteriser(store)
+        color = spec['color'] if keep is None else np.where(keep, spec['color'], np.nan)
+        overlay = rasteriser.render(spec['key'], color, spec['colorscale'], smooth=spec.get('smooth', 0))
+        points = rasteriser.hover_points()
+        if keep is not None:
+            points = points[keep[points]]
+        return raster_map(
+            overlay, encoder.lat[points], encoder.lon[points], color=spec['color'][points],
+            title=spec['title'],
+            colorscale=spec['colorscale'],
+            colorbar_title=spec['colorbar_title'],
+            customdata=_subset(spec.get('customdata'), points),
+            hovertemplate=hover_template(spec['hover'])
+        )
+
+    if density:
+        return density_map(
+            encoder.lat, encoder.lon, z=spec['color'],
+            title=spec['title'],
+            colorscale=spec['colorscale'],
+            colorbar_title=spec['colorbar_title'],
+            hovertemplate=hover_template([(label, ref.replace('marker.color', 'z'), fmt)
+                                          for label, ref, fmt in spec['hover']])
+        )
+
+    index = slice(None) if keep is None else keep
+    return scatter_map(
+        encoder.lat[index], encoder.lon[index], color=spec['color'][index], size=spec['size'][index],
+        title=spec['title'],
+        colorscale=spec['colorscale'],
+        colorbar_title=spec['colorbar_title'],
+        customdata=_subset(spec.get('customdata'), index),
+        hovertemplate=hover_template(spec['hover'])
+    )
+
+
+def build_scenario_figure(scenario_df):
+    """Bar/line chart of hot days across warming scenarios.
+
+    ``scenario_df`` has one row per scenario with ``Scenario``, ``mean``,
+    ``min``, ``max``, ``p10`` and ``p90`` columns.
+    """
+    fig = go.Figure()
+
+    # 10th-90th percentile band behind the bars
+    fig.add_trace(go.Scatter(
+        x=scenario_df['Scenario'],
+        y=scenario_df['p90'],
+        mode='lines',
+        line=dict(width=0),
+        showlegend=False,
+        hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        name='10th-90th Percentile',
+        x=scenario_df['Scenario'],
+        y=scenario_df['p10'],
+        mode='lines',
+        line=dict(width=0),
+        fill='tonexty',
+        fillcolor='rgba(255, 170, 128, 0.25)',
+        hoverinfo='skip'
+    ))
+    fig.add_trace(go.Bar(
+        name='Average',
+        x=scenario_df['Scenario'],
+        y=scenario_df['mean'],
+        marker_color='#ff6b35',
+        text=scenario_df['mean'].round(1),
+        customdata=scenario_df[['p10', 'p90']],
+        hovertemplate='%{x}<br>Average: %{y:.1f}<br>10th-90th percentile: %{customdata[0]:.1f}-%{customdata[1]:.1f}<extra></extra>',
+        textposition='outside',
+        textfont=dict(color='white', size=13)
+    ))
+    fig.add_trace(go.Scatter(
+        name='Maximum',
+        x=scenario_df['Scenario'],
+        y=scenario_df['max'],
+        mode='lines+markers',
+        line=dict(color='#dc143c', width=3),
+        marker=dict(size=10)
+    ))
+    fig.add_trace(go.Scatter(
+        name='Minimum',
+        x=scenario_df['Scenario'],
+        y=scenario_df['min'],
+        mode='lines+markers',
+        line=dict(color='#ff9966', width=3),
+        marker=dict(size=10)
+    ))
+
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title='<b>Hot Days Across Warming Scenarios</b>',
+        xaxis_title='Warming Scenario',
+        yaxis_title='Hot Days per Year',
+        height=550
+    )
+    return fig
+
+
+def build_region_figure(regions_df, scenario):
+    """Grouped baseline/projected bars per region."""
+    fig = go.Figure()
+    for name, colour in (('Baseline', '#4169e1'), ('Projected', '#ff4500')):
+        fig.add_trace(go.Bar(
+            name=name,
+            x=regions_df['Region'],
+            y=regions_df[name],
+            marker_color=colour,
+            text=regions_df[name].round(1),
+            textposition='outside',
+            textfont=dict(color='white', size=12)
+        ))
+
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title=f'<b>Regional Breakdown: {scenario} Warming</b>',
+        xaxis_title='Region',
+        yaxis_title='Hot Days per Year',
+        height=550,
+        barmode='group',
+        xaxis_showgrid=False
+    )
+    return fig
+
+
+class CachedFigure(go.Figure):
+    """A figure backed by an already-serialised spec.
+
+    Relies on how figures are turned into JSON: ``st.plotly_chart`` (via
+    ``plotly.tools.return_figure_from_figure_or_data``) and ``pio.to_json``
+    both call ``to_dict()`` on a ``Figure`` and treat the result as already
+    validated.  Returning the decoded cache entry here therefore skips
+    building and validating the traces; what a hit still pays is one
+    ``json.loads`` plus Streamlit re-encoding that plain dict, about 0.5 ms
+    for a 12 km map against 6-8 ms to rebuild it.  Anything that reads the
+    figure's traces directly (``fig.data``) sees an empty figure.
+    """
+
+    def __init__(self, spec_json):
+        super().__init__()
+        self._spec_json = spec_json
+
+    def to_dict(self):
+        return json.loads(self._spec_json)
+
+    def to_json(self, *args, **kwargs):
+        return self._spec_json
+
+
+class FigureCache:
+    """Thread-safe LRU of serialised figures, bounded by entries and bytes."""
+
+    def __init__(self, max_entries=64, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, build):
+        """Return the JSON for ``key``, calling ``build()`` for a figure on a miss."""
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return spec
+            self.misses += 1
+
+        # Build outside the lock so other sessions aren't blocked meanwhile
+        spec = pio.to_json(build(), validate=False)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = spec
+                self._bytes += len(spec)
+                while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                    _, old = self._entries.popitem(last=False)
+                    self._bytes -= len(old)
+                    self.evictions += 1
+        return spec
+
+    def figure(self, key, build):
+        """Like ``get`` but wrapped for ``st.plotly_chart``."""
+        return CachedFigure(self.get(key, build))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
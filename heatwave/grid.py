@@ -0,0 +1,86 @@
+"""Dense 2-D representation of the gridded data.
+
+Every cell sits on a regular ``Projection_x/y_coordinate`` lattice (12 km for
+the bundled file), so values can be scattered onto a (y, x) array with NaN
+for sea and out-of-domain cells.  The raster backend smooths and draws those
+arrays, and point lookups (``lookup.CellLocator``) index the lattice instead
+of searching the flat table.  Region statistics stay on the flat table: one
+``np.bincount`` per region set (``regions``) beats a dense (column, y, x)
+copy of every column."""
+
+import numpy as np
+
+
+class RegularGrid:
+    """Placement of the flat cell table on its projection lattice.
+
+    Rows run south to north (increasing y), columns west to east.
+    """
+
+    def __init__(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        xs = np.unique(x)
+        ys = np.unique(y)
+        self.dx = float(np.min(np.diff(xs))) if xs.size > 1 else 1.0
+        self.dy = float(np.min(np.diff(ys))) if ys.size > 1 else self.dx
+        self.x0 = float(xs[0])
+        self.y0 = float(ys[0])
+        self.col = np.rint((x - self.x0) / self.dx).astype(np.intp)
+        self.row = np.rint((y - self.y0) / self.dy).astype(np.intp)
+        self.nx = int(self.col.max()) + 1
+        self.ny = int(self.row.max()) + 1
+
+        # Flat cell index behind every lattice position, -1 where empty
+        self.cell_index = np.full((self.ny, self.nx), -1, dtype=np.intp)
+        self.cell_index[self.row, self.col] = np.arange(x.size)
+        if np.count_nonzero(self.cell_index >= 0) != x.size:
+            raise ValueError('Several cells share a lattice position; coordinates are not on a regular grid')
+        for arr in (self.col, self.row, self.cell_index):
+            arr.flags.writeable = False
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.column('Projection_x_coordinate'), store.column('Projection_y_coordinate'))
+
+    @property
+    def shape(self):
+        return (self.ny, self.nx)
+
+    def dense(self, values, fill=np.nan, dtype=np.float32):
+        """Scatter per-cell ``values`` onto a (y, x) array."""
+        out = np.full(self.shape, fill, dtype=dtype)
+        out[self.row, self.col] = values
+        return out
+
+    def locate(self, x, y):
+        """Lattice ``(row, col)`` for projection coordinates; -1 when outside."""
+        col = np.rint((np.asarray(x, dtype=np.float64) - self.x0) / self.dx).astype(np.intp)
+        row = np.rint((np.asarray(y, dtype=np.float64) - self.y0) / self.dy).astype(np.intp)
+        outside = (col < 0) | (col >= self.nx) | (row < 0) | (row >= self.ny)
+        col[outside] = -1
+        row[outside] = -1
+        return row, col
+
+
+def smooth(dense, radius):
+    """Mean of the valid cells in a (2r+1)^2 window, via summed-area tables.
+
+    Works on (..., y, x) stacks; empty cells stay empty.
+    """
+    if radius <= 0:
+        return dense
+    valid = ~np.isnan(dense)
+    filled = np.where(valid, dense, 0).astype(np.float64)
+    pad = [(0, 0)] * (dense.ndim - 2) + [(radius, radius), (radius, radius)]
+    lead = [(0, 0)] * (dense.ndim - 2) + [(1, 0), (1, 0)]
+    k = 2 * radius + 1
+
+    def window_sum(a):
+        sat = np.pad(np.pad(a, pad).cumsum(-2).cumsum(-1), lead)
+        return sat[..., k:, k:] - sat[..., :-k, k:] - sat[..., k:, :-k] + sat[..., :-k, :-k]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        smoothed = window_sum(filled) / window_sum(valid.astype(np.float64))
+    return np.where(valid, smoothed, np.nan).astype(np.float32)
+
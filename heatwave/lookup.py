@@ -0,0 +1,112 @@
+"""Nearest grid cell lookup for lon/lat points.
+
+Points are projected onto the lattice with the fitted ``GridProjection`` and
+resolved by index arithmetic: the candidates are the cells in a small window
+around the lattice position, and the nearest valid centre wins.  Everything
+is vectorised over the input points, so a site list of thousands of
+coordinates is one call.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .grid import RegularGrid
+from .projection import GridProjection
+
+
+# float32 holds about seven significant decimal digits
+_FLOAT32_DIGITS = 7
+
+
+def _float32_decimals(values):
+    """Decimal places within float32 precision at a column's magnitude.
+
+    Rounding the widened values to these places drops the float32 noise
+    (2.2, not 2.2000000477) without changing any digit the CSV had.
+    """
+    largest = float(np.nanmax(np.abs(values))) if values.size else 0.0
+    if not np.isfinite(largest) or largest == 0:
+        return _FLOAT32_DIGITS - 1
+    return _FLOAT32_DIGITS - 1 - int(np.floor(np.log10(largest)))
+
+
+class CellLocator:
+    """Resolves lon/lat points to the nearest cell of one grid.
+
+    Points further than ``max_distance`` grid cells from any cell centre (out
+    at sea, or outside the UK) resolve to -1.
+    """
+
+    def __init__(self, store, grid=None, projection=None, max_distance=1.5):
+        self.store = store
+        self.grid = grid or RegularGrid.from_store(store)
+        self.projection = projection or GridProjection.from_store(store)
+        self.max_distance = max_distance
+
+        reach = int(np.ceil(max_distance))
+        offsets = np.arange(-reach, reach + 1)
+        d_row, d_col = [a.ravel() for a in np.meshgrid(offsets, offsets, indexing='ij')]
+        self._offsets = (d_row, d_col)
+        self._x = np.asarray(store.column('Projection_x_coordinate'), dtype=np.float64)
+        self._y = np.asarray(store.column('Projection_y_coordinate'), dtype=np.float64)
+        self._decimals = {
+            name: _float32_decimals(np.asarray(store.column(name)))
+            for name in store.names if store.column(name).dtype == np.float32
+        }
+
+    def nearest(self, latitude, longitude):
+        """Return ``(cell_index, distance_m)`` arrays for lon/lat arrays."""
+        latitude = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+        longitude = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+        x, y = self.projection.forward(latitude, longitude)
+        grid = self.grid
+
+        # Fractional lattice position, then every candidate in the window
+        row = np.rint((y - grid.y0) / grid.dy).astype(np.intp)[:, None] + self._offsets[0]
+        col = np.rint((x - grid.x0) / grid.dx).astype(np.intp)[:, None] + self._offsets[1]
+        inside = (row >= 0) & (row < grid.ny) & (col >= 0) & (col < grid.nx)
+        candidates = np.where(inside, grid.cell_index[np.where(inside, row, 0), np.where(inside, col, 0)], -1)
+
+        dist = np.hypot(self._x[candidates] - x[:, None], self._y[candidates] - y[:, None])
+        dist[candidates < 0] = np.inf
+        best = dist.argmin(axis=1)
+        points = np.arange(len(x))
+        index = candidates[points, best]
+        distance = dist[points, best]
+
+        too_far = distance > self.max_distance * max(grid.dx, grid.dy)
+        index[too_far] = -1
+        distance[too_far] = np.nan
+        return index, distance
+
+    def record(self, latitude, longitude):
+        """Full column record of the nearest cell as a dict, or ``None``."""
+        index, distance = self.nearest(latitude, longitude)
+        i = int(index[0])
+        if i < 0:
+            return None
+        record = {}
+        for name in self.store.names:
+            value = self.store.column(name)[i]
+            decimals = self._decimals.get(name)
+            record[name] = value.item() if decimals is None else round(float(value), decimals)
+        record['distance_m'] = float(distance[0])
+        return record
+
+    def records(self, latitude, longitude):
+        """DataFrame with one row per input point (NaN where unresolved)."""
+        index, distance = self.nearest(latitude, longitude)
+        found = index >= 0
+        safe = np.where(found, index, 0)
+        data = {
+            'query_latitude': np.atleast_1d(latitude),
+            'query_longitude': np.atleast_1d(longitude),
+            'distance_m': distance,
+        }
+        for name in self.store.names:
+            values = np.asarray(self.store.column(name))[safe].astype(np.float64)
+            if name in self._decimals:
+                values = np.round(values, self._decimals[name])
+            values[~found] = np.nan
+            data[name] = values
+        return pd.DataFrame(data)
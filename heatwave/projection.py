@@ -0,0 +1,54 @@
+"""Mapping between longitude/latitude and the grid's projection coordinates.
+
+The Met Office exports carry both lon/lat and British National Grid
+coordinates for every cell, so rather than implementing the projection we fit
+a low-order polynomial in each direction from the data itself.  Over the UK a
+cubic is accurate to well under a kilometre, far below the grid spacing.
+"""
+
+import numpy as np
+
+
+def _terms(a, b, degree):
+    return np.stack([a ** i * b ** j for i in range(degree + 1) for j in range(degree + 1 - i)], axis=-1)
+
+
+class _Polynomial2D:
+    def __init__(self, a, b, targets, degree):
+        a = np.asarray(a, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+        self.degree = degree
+        self.shift = np.array([a.mean(), b.mean()])
+        self.scale = np.array([a.std() or 1.0, b.std() or 1.0])
+        self.coefficients, *_ = np.linalg.lstsq(self._design(a, b), np.column_stack(targets), rcond=None)
+
+    def _design(self, a, b):
+        a = (np.asarray(a, dtype=np.float64) - self.shift[0]) / self.scale[0]
+        b = (np.asarray(b, dtype=np.float64) - self.shift[1]) / self.scale[1]
+        return _terms(a, b, self.degree)
+
+    def __call__(self, a, b):
+        out = self._design(a, b) @ self.coefficients
+        return out[..., 0], out[..., 1]
+
+
+class GridProjection:
+    """Fitted forward (lon/lat -> x/y) and inverse (x/y -> lon/lat) transforms."""
+
+    def __init__(self, latitude, longitude, x, y, degree=3):
+        self._forward = _Polynomial2D(latitude, longitude, [x, y], degree)
+        self._inverse = _Polynomial2D(x, y, [latitude, longitude], degree)
+
+    @classmethod
+    def from_store(cls, store, degree=3):
+        return cls(store.column('Latitude'), store.column('Longitude'),
+                   store.column('Projection_x_coordinate'), store.column('Projection_y_coordinate'),
+                   degree=degree)
+
+    def forward(self, latitude, longitude):
+        """Return ``(x, y)`` projection coordinates for lat/lon arrays."""
+        return self._forward(latitude, longitude)
+
+    def inverse(self, x, y):
+        """Return ``(latitude, longitude)`` for projection coordinate arrays."""
+        return self._inverse(x, y)
@@ -0,0 +1,111 @@
+"""Top-k / bottom-k cell rankings for HSD and derived columns.
+
+At load time one ``np.argpartition`` per direction runs over every HSD column
+and every precomputed change array together, keeping the ``k_max`` extreme
+cells of each.  Only those few candidates are then sorted, so a ranking
+request is a slice of a small array whatever the size of the grid.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .schema import is_hsd_column
+
+DERIVED = ('change', 'change_pct')
+
+
+def extreme_indices(block, k, largest=True):
+    """Indices of the ``k`` largest (or smallest) values along the last axis, in rank order.
+
+    Ties are broken by cell order.
+    """
+    block = np.asarray(block)
+    n = block.shape[-1]
+    k = min(k, n)
+    keyed = -block if largest else block
+    if k < n:
+        candidates = np.argpartition(keyed, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), block.shape).copy()
+    values = np.take_along_axis(keyed, candidates, axis=-1)
+    # Sort the k candidates by value, then by cell index
+    order = np.lexsort((candidates, values), axis=-1)
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+class Ranking:
+    """Precomputed extreme cells for one store and its scenario cube."""
+
+    def __init__(self, store, cube, k_max=100):
+        self.store = store
+        self.cube = cube
+        self.k_max = k_max
+        self.latitude = np.asarray(store.column('Latitude'))
+        self.longitude = np.asarray(store.column('Longitude'))
+
+        self.names = [name for name in store.names if is_hsd_column(name)]
+        self._position = {name: i for i, name in enumerate(self.names)}
+        block = np.stack([store.column(name) for name in self.names])
+        self._columns = {
+            'top': extreme_indices(block, k_max, largest=True),
+            'bottom': extreme_indices(block, k_max, largest=False),
+        }
+        # Derived arrays keep the cube's (confidence, scenario, baseline, cell) layout
+        self._derived = {
+            (kind, which): extreme_indices(getattr(cube, kind), k_max, largest=(which == 'top'))
+            for kind in DERIVED for which in ('top', 'bottom')
+        }
+        self._tables = {}
+
+    def indices(self, column, k=10, which='top', selection=None):
+        """Cell indices of the ``k`` most extreme values, most extreme first.
+
+        ``column`` is an HSD column name, or ``'change'``/``'change_pct'``
+        together with ``selection=(scenario, confidence, baseline)``.
+        """
+        if which not in ('top', 'bottom'):
+            raise ValueError(f'Unknown ranking direction: {which!r}')
+        if k > self.k_max:
+            raise ValueError(f'k={k} exceeds the precomputed k_max={self.k_max}')
+        if column in DERIVED:
+            if selection is None:
+                raise ValueError(f'{column!r} needs a (scenario, confidence, baseline) selection')
+            return self._derived[column, which][self.cube._position(*selection)][:k]
+        return self._columns[which][self._position[column]][:k]
+
+    def values(self, column, selection=None):
+        if column in DERIVED:
+            return getattr(self.cube, f'{column}_for')(*selection)
+        return self.store.column(column)
+
+    def table(self, column, k=10, which='top', selection=None):
+        """DataFrame of the ranked cells with their coordinates and value."""
+        key = (column, k, which, selection)
+        table = self._tables.get(key)
+        if table is None:
+            index = self.indices(column, k, which, selection)
+            table = pd.DataFrame({
+                'Rank': np.arange(1, len(index) + 1),
+                'Latitude': self.latitude[index],
+                'Longitude': self.longitude[index],
+                column: self.values(column, selection)[index],
+            }, index=pd.Index(index, name='cell'))
+            self._tables[key] = table
+        return table
+
+    def first(self, column, which='top', selection=None):
+        """``(value, latitude, longitude)`` of the single most extreme cell."""
+        i = self.indices(column, 1, which, selection)[0]
+        return (float(self.values(column, selection)[i]),
+                float(self.latitude[i]), float(self.longitude[i]))
+
+
+_rankings = {}
+
+
+def load_ranking(store, cube):
+    """``Ranking`` for a store, built once per data version."""
+    ranking = _rankings.get(store.version)
+    if ranking is None:
+        ranking = _rankings[store.version] = Ranking(store, cube)
+    return ranking
@@ -0,0 +1,184 @@
+"""Server-side rasterisation of gridded values into a map image overlay.
+
+Scatter markers stop being usable in the browser beyond a few tens of
+thousands of cells (the 5 km and 2.2 km products).  Here the cell values are
+drawn into a single PNG/WebP covering the grid, which mapbox displays as an
+image layer; the browser then only receives the image plus a thinned set of
+points for hover.
+
+Pixels are laid out uniformly in longitude and Web-Mercator y, matching how
+mapbox stretches an image between four corner coordinates.  Each pixel centre
+is projected onto the regular ``Projection_x/y_coordinate`` lattice with the
+fitted ``GridProjection`` and takes the value of the cell it falls in.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+from plotly.colors import get_colorscale, sample_colorscale
+
+from .cache import CACHE_DIR
+from .grid import RegularGrid, smooth as smooth_grid
+from .projection import GridProjection
+
+RASTER_DIR = os.path.join(os.path.dirname(CACHE_DIR), 'rasters')
+FORMATS = ('png', 'webp')
+# Colours per image; palette index 0 is reserved for transparent pixels
+PALETTE_STEPS = 255
+
+RasterOverlay = namedtuple('RasterOverlay', ['source', 'coordinates', 'vmin', 'vmax'])
+
+
+def colour_table(colorscale, steps=256):
+    """RGBA lookup table (steps x 4, uint8) for a Plotly colorscale."""
+    colours = sample_colorscale(get_colorscale(colorscale), np.linspace(0, 1, steps), colortype='tuple')
+    table = np.empty((steps, 4), dtype=np.uint8)
+    table[:, :3] = np.rint(np.asarray(colours) * 255)
+    table[:, 3] = 255
+    return table
+
+
+def _mercator_y(lat):
+    return np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+
+def _latitude(merc_y):
+    return np.degrees(2 * np.arctan(np.exp(merc_y)) - np.pi / 2)
+
+
+class Rasteriser:
+    """Renders value arrays for one grid into image overlays.
+
+    Rendered images are written under ``RASTER_DIR/<data version>/`` so they
+    survive restarts and are shared between worker processes.
+    """
+
+    def __init__(self, store, pixels_per_cell=4, max_width=1600, cache_dir=None):
+        self.store = store
+        self.grid = RegularGrid.from_store(store)
+        self.projection = GridProjection.from_store(store)
+        self.cache_dir = os.path.join(cache_dir or RASTER_DIR, store.version)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # Bounds from the lattice outline, extended by half a cell
+        grid = self.grid
+        xs = grid.x0 + (np.arange(grid.nx + 1) - 0.5) * grid.dx
+        ys = grid.y0 + (np.arange(grid.ny + 1) - 0.5) * grid.dy
+        edge_x = np.concatenate([xs, xs, np.full(ys.size, xs[0]), np.full(ys.size, xs[-1])])
+        edge_y = np.concatenate([np.full(xs.size, ys[0]), np.full(xs.size, ys[-1]), ys, ys])
+        lat, lon = self.projection.inverse(edge_x, edge_y)
+        self.west, self.east = float(lon.min()), float(lon.max())
+        self.south, self.north = float(lat.min()), float(lat.max())
+
+        self.width = int(min(max_width, grid.nx * pixels_per_cell))
+        merc_span = _mercator_y(self.north) - _mercator_y(self.south)
+        self.height = max(1, int(round(self.width * merc_span / np.radians(self.east - self.west))))
+
+        # Cell index behind every pixel, computed once per grid
+        lon_px = self.west + (np.arange(self.width) + 0.5) / self.width * (self.east - self.west)
+        merc_px = _mercator_y(self.north) - (np.arange(self.height) + 0.5) / self.height * merc_span
+        lon_grid, lat_grid = np.meshgrid(lon_px, _latitude(merc_px))
+        px_x, px_y = self.projection.forward(lat_grid.ravel(), lon_grid.ravel())
+        self.pixel_row, self.pixel_col = grid.locate(px_x, px_y)
+
+    @property
+    def coordinates(self):
+        """Image corners for a mapbox image layer: NW, NE, SE, SW."""
+        return [[self.west, self.north], [self.east, self.north],
+                [self.east, self.south], [self.west, self.south]]
+
+    def _cache_path(self, key, fmt):
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=12).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.{fmt}')
+
+    def _encode(self, values, colorscale, vmin, vmax, smooth, fmt):
+        dense = smooth_grid(self.grid.dense(values), smooth)
+
+        # Palette index per cell (0 = no data, transparent), then per pixel:
+        # one byte per pixel is cheaper to gather and to compress than RGBA
+        span = (vmax - vmin) or 1.0
+        valid = ~np.isnan(dense)
+        cell_index = np.zeros(dense.shape, dtype=np.uint8)
+        scaled = np.clip((dense[valid] - vmin) / span, 0, 1)
+        cell_index[valid] = np.rint(scaled * (PALETTE_STEPS - 1)).astype(np.uint8) + 1
+        inside = self.pixel_row >= 0
+        pixels = np.zeros(self.pixel_row.shape, dtype=np.uint8)
+        pixels[inside] = cell_index[self.pixel_row[inside], self.pixel_col[inside]]
+
+        palette = np.zeros((PALETTE_STEPS + 1, 4), dtype=np.uint8)
+        palette[1:] = colour_table(colorscale, PALETTE_STEPS)
+        image = Image.fromarray(pixels.reshape(self.height, self.width))
+        image.putpalette(palette[:, :3].tobytes())
+        image.info['transparency'] = palette[:, 3].tobytes()
+        out = io.BytesIO()
+        if fmt == 'png':
+            image.save(out, format='PNG')
+        else:
+            image.convert('RGBA').save(out, format='WEBP', lossless=True)
+        return out.getvalue()
+
+    def render(self, key, values, colorscale, vmin=None, vmax=None, smooth=0, fmt='png'):
+        """Return a ``RasterOverlay`` for ``values``.
+
+        ``key`` identifies what ``values`` are (e.g. the column name) and is
+        combined with the styling arguments to key the on-disk cache.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f'Unknown image format: {fmt!r}')
+        values = np.asarray(values, dtype=np.float32)
+        # An all-NaN layer (nothing to draw) renders fully transparent
+        empty = bool(np.isnan(values).all())
+        if vmin is None:
+            vmin = 0.0 if empty else float(np.nanmin(values))
+        if vmax is None:
+            vmax = 0.0 if empty else float(np.nanmax(values))
+
+        path = self._cache_path((key, colorscale, vmin, vmax, smooth, self.width, self.height, PALETTE_STEPS), fmt)
+        try:
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            hit = True
+        except FileNotFoundError:
+            hit = False
+            data = self._encode(values, colorscale, vmin, vmax, smooth, fmt)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            scratch = f'{path}.{os.getpid()}.tmp'
+            with open(scratch, 'wb') as fh:
+                fh.write(data)
+            os.replace(scratch, path)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        source = f'data:image/{fmt};base64,' + base64.b64encode(data).decode('ascii')
+        return RasterOverlay(source, self.coordinates, vmin, vmax)
+
+    def stats(self):
+        """Disk cache hits and misses in this process, and the images on disk."""
+        files = total = 0
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(tuple(f'.{fmt}' for fmt in FORMATS)):
+                        files += 1
+                        total += entry.stat().st_size
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            return {'entries': files, 'bytes': total, 'hits': self.hits, 'misses': self.misses}
+
+    def hover_points(self, max_points=5000):
+        """Indices of a lattice-thinned subset of cells used for hover labels."""
+        step = max(1, int(np.ceil(np.sqrt(self.store.size / max_points))))
+        keep = (self.grid.col % step == 0) & (self.grid.row % step == 0)
+        return np.flatnonzero(keep)
@@ -0,0 +1,183 @@
+"""Region membership for grid cells and grouped region statistics.
+
+Cells are assigned to regions once, by point-in-polygon against a boundary
+GeoJSON (nations, ITL1 regions, local authorities, ...).  Coastal cells whose
+centre falls just outside a generalised coastline go to the nearest polygon
+within ``snap_distance`` degrees.  The result is a single integer label per
+cell, so the mean of every column for every region is one ``np.bincount``
+regardless of how many regions there are.
+"""
+
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import CACHE_DIR, file_hash
+from .schema import is_hsd_column
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'boundaries')
+REGION_CACHE_DIR = os.path.join(os.path.dirname(CACHE_DIR), 'regions')
+DEFAULT_BOUNDARY = os.path.join(BOUNDARY_DIR, 'nations.geojson')
+
+# Name fields used by ONS Open Geography boundary files, e.g. CTRY22NM, ITL121NM
+_NAME_SUFFIX = 'NM'
+
+
+def available_boundaries(directory=None):
+    """Map a display name to the path of each bundled boundary file, the default first."""
+    paths = sorted(glob.glob(os.path.join(directory or BOUNDARY_DIR, '*.geojson')),
+                   key=lambda p: (os.path.basename(p) != os.path.basename(DEFAULT_BOUNDARY), p))
+    return {os.path.splitext(os.path.basename(p))[0].replace('_', ' ').capitalize(): p for p in paths}
+
+
+def _feature_name(properties, name_property):
+    if name_property:
+        return str(properties[name_property])
+    if 'name' in properties:
+        return str(properties['name'])
+    for key, value in properties.items():
+        if key.upper().endswith(_NAME_SUFFIX):
+            return str(value)
+    raise ValueError(f'No name property found among {sorted(properties)}')
+
+
+def _rings(geometry):
+    if geometry['type'] == 'Polygon':
+        return [np.asarray(ring, dtype=np.float64) for ring in geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return [np.asarray(ring, dtype=np.float64) for polygon in geometry['coordinates'] for ring in polygon]
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def _edges(rings):
+    """Stack every ring's edges as (x0, y0, x1, y1) arrays."""
+    starts = np.concatenate([ring[:-1] for ring in rings])
+    ends = np.concatenate([ring[1:] for ring in rings])
+    return starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+
+
+def points_in_polygon(x, y, edges, chunk=1 << 22):
+    """Even-odd ray casting for many points against one polygon's edges.
+
+    Holes and multipart polygons need no special handling because every ring's
+    edges count towards the crossing parity.
+    """
+    x0, y0, x1, y1 = edges
+    inside = np.zeros(x.shape, dtype=bool)
+    step = max(1, chunk // max(1, x0.size))
+    for start in range(0, x.size, step):
+        px = x[start:start + step, None]
+        py = y[start:start + step, None]
+        straddles = (y0 > py) != (y1 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cross_x = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+        inside[start:start + step] = np.count_nonzero(straddles & (px < cross_x), axis=1) % 2 == 1
+    return inside
+
+
+def distance_to_edges(x, y, edges, chunk=1 << 22):
+    """Distance from each point to the nearest edge (in coordinate units)."""
+    x0, y0, x1, y1 = edges
+    dx = x1 - x0
+    dy = y1 - y0
+    length2 = np.where(dx * dx + dy * dy > 0, dx * dx + dy * dy, 1)
+    out = np.empty(x.shape, dtype=np.float64)
+    step = max(1, chunk // max(1, x0.size))
+    for start in range(0, x.size, step):
+        px = x[start:start + step, None]
+        py = y[start:start + step, None]
+        t = np.clip(((px - x0) * dx + (py - y0) * dy) / length2, 0, 1)
+        out[start:start + step] = np.hypot(x0 + t * dx - px, y0 + t * dy - py).min(axis=1)
+    return out
+
+
+class RegionIndex:
+    """Integer region label per grid cell for one boundary file.
+
+    ``labels`` is -1 for cells outside every region.
+    """
+
+    def __init__(self, store, boundary_path, name_property=None, snap_distance=0.1, cache_dir=None):
+        with open(boundary_path, encoding='utf-8') as fh:
+            features = json.load(fh)['features']
+        self.names = [_feature_name(f['properties'], name_property) for f in features]
+        self.version = store.version
+
+        cache_key = hashlib.blake2b(
+            f'{store.version}:{file_hash(boundary_path)}:{name_property}:{snap_distance}'.encode('utf-8'),
+            digest_size=12).hexdigest()
+        cache_path = os.path.join(cache_dir or REGION_CACHE_DIR, f'{cache_key}.npy')
+        try:
+            labels = np.load(cache_path)
+        except FileNotFoundError:
+            labels = self._assign(store, features, snap_distance)
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            scratch = f'{cache_path}.{os.getpid()}.tmp.npy'
+            np.save(scratch, labels)
+            os.replace(scratch, cache_path)
+        labels.flags.writeable = False
+        self.labels = labels
+        self.counts = np.bincount(labels[labels >= 0], minlength=len(self.names))
+
+    @staticmethod
+    def _assign(store, features, snap_distance):
+        lon = np.asarray(store.column('Longitude'), dtype=np.float64)
+        lat = np.asarray(store.column('Latitude'), dtype=np.float64)
+        labels = np.full(lon.size, -1, dtype=np.int32)
+        edges = [_edges(_rings(f['geometry'])) for f in features]
+
+        for label, polygon in enumerate(edges):
+            # Bounding-box prefilter, then exact test on the remaining cells
+            x0, y0, x1, y1 = polygon
+            candidates = np.flatnonzero(
+                (labels < 0)
+                & (lon >= min(x0.min(), x1.min())) & (lon <= max(x0.max(), x1.max()))
+                & (lat >= min(y0.min(), y1.min())) & (lat <= max(y0.max(), y1.max()))
+            )
+            if candidates.size:
+                hit = points_in_polygon(lon[candidates], lat[candidates], polygon)
+                labels[candidates[hit]] = label
+
+        missing = np.flatnonzero(labels < 0)
+        if missing.size and snap_distance > 0:
+            distances = np.stack([distance_to_edges(lon[missing], lat[missing], polygon) for polygon in edges])
+            nearest = distances.argmin(axis=0)
+            close = distances[nearest, np.arange(missing.size)] <= snap_distance
+            labels[missing[close]] = nearest[close]
+        return labels
+
+    def means(self, block, weights=None):
+        """Per-region means of a (cell, column) block, as (region, column).
+
+        One ``np.bincount`` over combined (region, column) bins, so the cost
+        does not grow with a Python loop over regions.  With per-cell
+        ``weights`` (e.g. ``weights.area_weights``) the means are weighted.
+        """
+        block = np.asarray(block)
+        if block.ndim == 1:
+            return self.means(block[:, None], weights)[:, 0]
+        n_regions = len(self.names)
+        n_cols = block.shape[1]
+        valid = self.labels >= 0
+        values = block[valid].astype(np.float64)
+        if weights is None:
+            totals = self.counts
+        else:
+            cell_weights = np.asarray(weights, dtype=np.float64)[valid]
+            values *= cell_weights[:, None]
+            totals = np.bincount(self.labels[valid], weights=cell_weights, minlength=n_regions)
+        bins = (self.labels[valid, None] * n_cols + np.arange(n_cols)).ravel()
+        sums = np.bincount(bins, weights=values.ravel(), minlength=n_regions * n_cols)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums.reshape(n_regions, n_cols) / totals[:, None]
+
+
+def region_column_means(store, index, weights=None):
+    """DataFrame of every HSD column's mean per region (regions x columns)."""
+    names = [name for name in store.names if is_hsd_column(name)]
+    block = np.column_stack([store.column(name) for name in names])
+    return pd.DataFrame(index.means(block, weights), index=index.names, columns=names)
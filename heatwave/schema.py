@@ -0,0 +1,19 @@
+"""Column names and selection options shared across the heatwave modules."""
+
+CSV_PATH = 'Annual_Count_of_Hot_Days___Projections__12km_grid__-7336973101011391426.csv'
+
+WARMING_SCENARIOS = ['1.5°C', '2°C', '2.5°C', '3°C', '4°C']
+CONFIDENCE_LEVELS = ['lower', 'median', 'upper']
+BASELINES = ['1981-2000', '2001-2020']
+
+
+def scenario_column(scenario, confidence):
+    return f'HSD {scenario} {confidence}'
+
+
+def baseline_column(baseline, confidence):
+    return f'HSD baseline {baseline} {confidence}'
+
+
+def is_hsd_column(name):
+    return name.startswith('HSD ')
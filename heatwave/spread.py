@@ -0,0 +1,74 @@
+"""How far apart the lower, median and upper projections are.
+
+The confidence levels are three bands of one projection, so the spread
+between them is computed for every scenario and baseline at once: the
+cube's change array already has the band as its leading axis, and each
+statistic is one vectorized reduction over it.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .schema import BASELINES, CONFIDENCE_LEVELS, WARMING_SCENARIOS
+from .weights import weighted_mean, weighted_quantiles
+
+SPREAD_METRICS = ('spread', 'relative', 'agreement')
+
+_LOWER, _MEDIAN, _UPPER = (CONFIDENCE_LEVELS.index(c) for c in ('lower', 'median', 'upper'))
+
+
+def band_spread(change):
+    """Spread, relative spread and agreement of a (band, ...) change array.
+
+    ``spread`` is upper minus lower change in hot days, ``relative`` that as
+    a percentage of the median change (same guard as ``change_pct``), and
+    ``agreement`` is true where all three bands change in the same
+    direction, or all show no change.
+    """
+    spread = change[_UPPER] - change[_LOWER]
+    relative = spread / (np.abs(change[_MEDIAN]) + 0.001) * 100
+    direction = np.sign(change)
+    agreement = (direction == direction[_MEDIAN]).all(axis=0)
+    return spread, relative, agreement
+
+
+class EnsembleSpread:
+    """Band spread for every scenario and baseline, from a ``ScenarioCube``.
+
+    Arrays are (scenario, baseline, cell).  ``weights`` (see ``weights``)
+    area-weight the per-scenario summary table.
+    """
+
+    def __init__(self, cube, weights):
+        self.spread, self.relative, self.agreement = band_spread(cube.change)
+        for arr in (self.spread, self.relative, self.agreement):
+            arr.flags.writeable = False
+        self._position = {
+            'scenario': {s: i for i, s in enumerate(WARMING_SCENARIOS)},
+            'baseline': {b: i for i, b in enumerate(BASELINES)},
+        }
+
+        # Every (scenario, baseline) as a column of one (cell, selection) block
+        n_cells = self.spread.shape[-1]
+        shape = self.spread.shape[:-1]
+        spread = weighted_mean(self.spread.reshape(-1, n_cells).T, weights).reshape(shape)
+        relative = weighted_quantiles(self.relative.reshape(-1, n_cells).T, weights, [0.5])[0].reshape(shape)
+        agreement = weighted_mean(self.agreement.reshape(-1, n_cells).T, weights).reshape(shape)
+        self._tables = {
+            baseline: pd.DataFrame({
+                'Scenario': WARMING_SCENARIOS,
+                'Mean spread (days)': spread[:, b],
+                'Median relative spread (%)': relative[:, b],
+                'Bands agree (% of grid)': agreement[:, b] * 100,
+            })
+            for b, baseline in enumerate(BASELINES)
+        }
+
+    def arrays(self, scenario, baseline):
+        """Read-only (spread, relative, agreement) views for one selection."""
+        position = (self._position['scenario'][scenario], self._position['baseline'][baseline])
+        return self.spread[position], self.relative[position], self.agreement[position]
+
+    def table(self, baseline):
+        """Area-weighted spread statistics per scenario against ``baseline``."""
+        return self._tables[baseline]
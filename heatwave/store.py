@@ -0,0 +1,72 @@
+"""Immutable access to the loaded grid plus per-session derived buffers.
+
+``GridStore`` is shared by every session (held with ``st.cache_resource``), so
+nothing is ever written into it: columns come back as read-only views and
+frames are assembled on demand from just the columns a chart needs.  Arrays
+that depend on the selection are written into a small ``DerivedBuffer`` owned
+by one session.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _read_only(values):
+    view = np.asarray(values).view()
+    view.flags.writeable = False
+    return view
+
+
+class GridStore:
+    """Read-only column store for one version of the gridded data."""
+
+    def __init__(self, columns, version):
+        self.version = version
+        self._columns = {name: _read_only(values) for name, values in columns.items()}
+        self.size = len(next(iter(self._columns.values())))
+
+    @property
+    def names(self):
+        return list(self._columns)
+
+    def column(self, name):
+        """Read-only view of one column."""
+        return self._columns[name]
+
+    __getitem__ = column
+
+    def frame(self, names, **extra):
+        """DataFrame over ``names`` (plus any ``extra`` arrays) without copying.
+
+        Allocation scales with the number of columns requested, not the width
+        of the grid.
+        """
+        data = {name: self._columns[name] for name in names}
+        data.update(extra)
+        return pd.DataFrame(data, copy=False)
+
+
+class DerivedBuffer:
+    """Preallocated per-session arrays for selection-dependent values.
+
+    Each named slot is allocated once at grid size and overwritten in place on
+    later reruns, so a rerun allocates nothing for the slots it reuses.
+    """
+
+    def __init__(self, size, dtype=np.float32):
+        self.size = size
+        self.dtype = dtype
+        self._slots = {}
+
+    def slot(self, name):
+        buf = self._slots.get(name)
+        if buf is None:
+            buf = self._slots[name] = np.empty(self.size, dtype=self.dtype)
+        return buf
+
+    def abs_plus(self, name, values, offset):
+        """Write ``abs(values) + offset`` into slot ``name`` and return it."""
+        out = self.slot(name)
+        np.abs(values, out=out)
+        out += offset
+        return out
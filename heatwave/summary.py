@@ -0,0 +1,46 @@
+"""Per-column summary statistics for every HSD column.
+
+All HSD columns are stacked into one (cell, column) float32 block and reduced
+in a single pass: the mean, plus one ``np.percentile`` call whose 0th and
+100th percentiles are the min and max.  Extra percentile bands therefore
+only add entries to ``PERCENTILES``, not scans.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .schema import is_hsd_column
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def summarise_block(block, names, percentiles=PERCENTILES):
+    """DataFrame of mean/min/max/percentiles for each column of ``block``."""
+    block = np.asarray(block)
+    quantiles = np.percentile(block, (0,) + tuple(percentiles) + (100,), axis=0)
+    table = {
+        'mean': block.mean(axis=0, dtype=np.float64),
+        'min': quantiles[0],
+        'max': quantiles[-1],
+    }
+    for p, values in zip(percentiles, quantiles[1:-1]):
+        table[f'p{p}'] = values
+    return pd.DataFrame(table, index=pd.Index(names, name='column')).astype(np.float64)
+
+
+def column_summary(store, percentiles=PERCENTILES):
+    """Summary table (HSD column x statistic) for one store."""
+    names = [name for name in store.names if is_hsd_column(name)]
+    block = np.column_stack([store.column(name) for name in names]).astype(np.float32, copy=False)
+    return summarise_block(block, names, percentiles)
+
+
+_summaries = {}
+
+
+def load_summary(store):
+    """``column_summary`` for a store, computed once per data version."""
+    summary = _summaries.get(store.version)
+    if summary is None:
+        summary = _summaries[store.version] = column_summary(store)
+    return summary
@@ -0,0 +1,78 @@
+"""Server-side sorting, filtering and paging for the data table.
+
+The browser only ever receives one page of rows, as an Arrow table.  Each
+sort order is a stable argsort computed the first time a column is sorted
+by and kept for the data version, so moving through the pages of a sorted,
+filtered grid is a mask over that order plus one gather per displayed
+column.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pyarrow as pa
+
+PAGE_SIZE = 100
+
+
+class SortIndex:
+    """Per-column sort orders for one data version.
+
+    Orders for stored columns are kept for good; orders for selection-derived
+    arrays (change, interpolated levels) go in a small LRU.
+    """
+
+    def __init__(self, max_derived=16):
+        self.max_derived = max_derived
+        self._orders = {}
+        self._derived = OrderedDict()
+        self._lock = threading.Lock()
+
+    def order(self, key, values, descending=False):
+        """Cell indices sorting ``values``, ties in cell order.
+
+        ``key`` identifies ``values``: a stored column name, or a tuple for
+        derived arrays.
+        """
+        cache = self._orders if isinstance(key, str) else self._derived
+        with self._lock:
+            order = cache.get((key, descending))
+            if order is not None:
+                if cache is self._derived:
+                    cache.move_to_end((key, descending))
+                return order
+
+        values = np.asarray(values)
+        order = np.argsort(-values if descending else values, kind='stable').astype(np.int32)
+        order.flags.writeable = False
+
+        with self._lock:
+            order = cache.setdefault((key, descending), order)
+            while len(self._derived) > self.max_derived:
+                self._derived.popitem(last=False)
+        return order
+
+
+def page_count(total, page_size=PAGE_SIZE):
+    """Number of pages for ``total`` rows; at least one, even when empty."""
+    return max(1, -(-total // page_size))
+
+
+def page_rows(order, page, page_size=PAGE_SIZE, keep=None):
+    """Cell indices on ``page`` (0-based) of ``order``, the page and the row count.
+
+    ``keep`` is an optional per-cell boolean filter; ``page`` is clamped to
+    the pages that remain after it.
+    """
+    if keep is not None:
+        order = order[keep[order]]
+    page = min(max(int(page), 0), page_count(len(order), page_size) - 1)
+    start = page * page_size
+    return order[start:start + page_size], page, len(order)
+
+
+def arrow_page(columns, rows):
+    """Arrow table of ``rows`` from a mapping of column name to per-cell array."""
+    return pa.table({name: np.asarray(values)[rows] for name, values in columns.items()})
+
@@ -0,0 +1,139 @@
+"""Plotly template and map helpers for the heatwave dashboard's look.
+
+The template is built once per process and registered as ``'heatwave'`` so
+figures refer to it by name instead of repeating (and re-validating) the same
+``update_layout`` block.  ``scatter_map`` and ``density_map`` build map figures
+straight from graph objects, skipping Plotly Express's dataframe reshaping;
+``raster_map`` shows a server-rendered image overlay instead of markers.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+TEMPLATE_NAME = 'heatwave'
+
+MAP_STYLE = 'carto-darkmatter'
+MAP_CENTER = {'lat': 54, 'lon': -2}
+MAP_ZOOM = 4.5
+MAP_HEIGHT = 550
+MAP_MARGIN = dict(l=0, r=0, t=40, b=0)
+
+# Plotly Express's default maximum marker diameter
+SIZE_MAX = 20
+
+
+def _build_template():
+    # Deliberately not derived from the stock 'plotly' template: Plotly
+    # deep-copies and validates the template on every figure, and that one is
+    # large enough to dominate construction time.
+    template = go.layout.Template()
+    axis = dict(
+        gridcolor='rgba(255,255,255,0.1)',
+        zerolinecolor='rgba(255,255,255,0.2)',
+        automargin=True,
+        tickfont=dict(color='white'),
+        title_font=dict(color='white')
+    )
+    template.layout.update(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=12),
+        colorway=pio.templates['plotly'].layout.colorway,
+        hovermode='closest',
+        title_x=0.5,
+        title_font=dict(size=16, color='white'),
+        coloraxis_colorbar=dict(
+            title_font=dict(color='white', size=12),
+            tickfont=dict(color='white')
+        ),
+        xaxis=axis,
+        yaxis=axis,
+        legend=dict(font=dict(color='white'))
+    )
+    return template
+
+
+if TEMPLATE_NAME not in pio.templates:
+    pio.templates[TEMPLATE_NAME] = _build_template()
+
+
+def _map_layout(title, colorscale, colorbar_title, cmin=None, cmax=None, layers=None):
+    # Plain dict: go.Figure validates it once, go.Layout would validate twice
+    return dict(
+        template=TEMPLATE_NAME,
+        title=dict(text=title),
+        height=MAP_HEIGHT,
+        margin=MAP_MARGIN,
+        mapbox=dict(style=MAP_STYLE, center=MAP_CENTER, zoom=MAP_ZOOM, layers=layers or []),
+        coloraxis=dict(
+            colorscale=colorscale,
+            cmin=cmin,
+            cmax=cmax,
+            colorbar=dict(title=dict(text=colorbar_title))
+        ),
+        legend=dict(itemsizing='constant')
+    )
+
+
+def hover_template(fields):
+    """Build a hovertemplate from ``(label, reference, format)`` triples."""
+    lines = [f'{label}=%{{{ref}:{fmt}}}' for label, ref, fmt in fields]
+    return '<br>'.join(lines) + '<extra></extra>'
+
+
+def scatter_map(lat, lon, color, size, title, colorscale, colorbar_title,
+                customdata=None, hovertemplate=None):
+    """Scatter map with Plotly Express's marker sizing, built from graph objects."""
+    size = np.asarray(size)
+    size_peak = float(np.nanmax(size)) if size.size else 0.0
+    trace = go.Scattermapbox(
+        lat=lat,
+        lon=lon,
+        mode='markers',
+        marker=dict(
+            color=color,
+            coloraxis='coloraxis',
+            size=size,
+            sizemode='area',
+            sizeref=2.0 * size_peak / SIZE_MAX ** 2 if size_peak > 0 else 1.0
+        ),
+        customdata=customdata,
+        hovertemplate=hovertemplate,
+        showlegend=False
+    )
+    return go.Figure(data=[trace], layout=_map_layout(title, colorscale, colorbar_title))
+
+
+def density_map(lat, lon, z, title, colorscale, colorbar_title, radius=15, hovertemplate=None):
+    """Density heatmap over mapbox, built from graph objects."""
+    trace = go.Densitymapbox(
+        lat=lat,
+        lon=lon,
+        z=z,
+        radius=radius,
+        coloraxis='coloraxis',
+        hovertemplate=hovertemplate
+    )
+    return go.Figure(data=[trace], layout=_map_layout(title, colorscale, colorbar_title))
+
+
+def raster_map(overlay, lat, lon, color, title, colorscale, colorbar_title,
+               customdata=None, hovertemplate=None):
+    """Map showing a ``RasterOverlay`` image, with invisible markers for hover.
+
+    ``lat``/``lon``/``color`` describe the (thinned) hover points; their
+    colours only drive the colorbar, which shares the overlay's value range.
+    """
+    trace = go.Scattermapbox(
+        lat=lat,
+        lon=lon,
+        mode='markers',
+        marker=dict(color=color, coloraxis='coloraxis', size=8, opacity=0),
+        customdata=customdata,
+        hovertemplate=hovertemplate,
+        showlegend=False
+    )
+    layer = dict(sourcetype='image', source=overlay.source, coordinates=overlay.coordinates, below='traces')
+    layout = _map_layout(title, colorscale, colorbar_title, overlay.vmin, overlay.vmax, layers=[layer])
+    return go.Figure(data=[trace], layout=layout)
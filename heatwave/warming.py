@@ -0,0 +1,116 @@
+"""Hot days at any warming level between the modelled scenarios.
+
+The projections exist for five global warming levels only.  Between them
+each cell is treated as piecewise linear in the warming level, so at load
+time every cell gets a slope and intercept per segment and the grid at any
+level is one multiply-add over a single segment's coefficients.  Run the
+other way, the same segments give the level at which each cell first reaches
+a number of hot days.
+
+Means are linear too: the average (or regional average) at an intermediate
+level is the same blend of the neighbouring scenarios' averages, so those
+never touch the grid.
+"""
+
+import numpy as np
+
+from .schema import CONFIDENCE_LEVELS, WARMING_SCENARIOS, scenario_column
+
+
+def warming_level(scenario):
+    """Numeric level of a scenario label, e.g. ``'2.5°C'`` -> 2.5."""
+    return float(scenario.rstrip('°C'))
+
+
+def scenario_label(scenario):
+    """Display label for a scenario label or a numeric warming level."""
+    if isinstance(scenario, str):
+        return scenario
+    return f'{scenario:g}°C'
+
+
+WARMING_LEVELS = np.array([warming_level(s) for s in WARMING_SCENARIOS])
+
+
+def scenario_for_level(level):
+    """The scenario label when ``level`` was modelled, otherwise the level itself."""
+    level = round(float(level), 6)
+    for scenario, modelled in zip(WARMING_SCENARIOS, WARMING_LEVELS):
+        if level == modelled:
+            return scenario
+    return level
+
+
+class WarmingCurve:
+    """Per-cell piecewise-linear hot days against warming level.
+
+    Coefficients are (confidence, segment, cell) float32 arrays; segment
+    ``i`` covers ``WARMING_LEVELS[i]`` to ``WARMING_LEVELS[i + 1]``.
+    """
+
+    def __init__(self, columns):
+        self.levels = WARMING_LEVELS
+        values = np.stack([
+            np.stack([columns[scenario_column(s, c)] for s in WARMING_SCENARIOS])
+            for c in CONFIDENCE_LEVELS
+        ]).astype(np.float32)
+        widths = np.diff(self.levels).astype(np.float32)
+        self.values = values
+        self.slope = np.diff(values, axis=1) / widths[None, :, None]
+        self.intercept = values[:, :-1] - self.slope * self.levels[:-1, None].astype(np.float32)
+        for arr in (self.values, self.slope, self.intercept):
+            arr.flags.writeable = False
+        self._confidence = {c: i for i, c in enumerate(CONFIDENCE_LEVELS)}
+        self._crossings = {}
+
+    def clip(self, level):
+        return float(np.clip(level, self.levels[0], self.levels[-1]))
+
+    def segment(self, level):
+        """Segment index for ``level`` and its fraction of the way along it."""
+        level = self.clip(level)
+        i = int(np.clip(np.searchsorted(self.levels, level, side='right') - 1, 0, len(self.levels) - 2))
+        return i, (level - self.levels[i]) / (self.levels[i + 1] - self.levels[i])
+
+    def at(self, level, confidence, out=None):
+        """Hot days per cell at ``level`` (clipped to the modelled range)."""
+        c = self._confidence[confidence]
+        i, _ = self.segment(level)
+        out = np.multiply(self.slope[c, i], np.float32(self.clip(level)), out=out)
+        out += self.intercept[c, i]
+        return out
+
+    def blend(self, by_scenario, level):
+        """Interpolate values given per scenario (first axis) to ``level``."""
+        by_scenario = np.asarray(by_scenario)
+        i, t = self.segment(level)
+        return by_scenario[i] * (1 - t) + by_scenario[i + 1] * t
+
+    def crossing(self, threshold, confidence):
+        """Lowest warming level at which each cell reaches ``threshold`` hot days.
+
+        Found by inverting the first segment that reaches it, for every cell
+        at once.  Cells already at the threshold in the lowest scenario get
+        ``WARMING_LEVELS[0]``; cells that never reach it get NaN.  Cached
+        per (threshold, confidence).
+        """
+        key = (float(threshold), confidence)
+        crossing = self._crossings.get(key)
+        if crossing is None:
+            values = self.values[self._confidence[confidence]]
+            above = values >= np.float32(threshold)
+            first = np.argmax(above, axis=0)[None]
+            # The segment ending at the first scenario above the threshold
+            before = np.maximum(first - 1, 0)
+            lo = np.take_along_axis(values, before, axis=0)[0]
+            hi = np.take_along_axis(values, first, axis=0)[0]
+            rise = hi - lo
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = np.where(rise > 0, (np.float32(threshold) - lo) / rise, 0)
+            levels = self.levels.astype(np.float32)
+            crossing = levels[before[0]] + np.clip(t, 0, 1) * (levels[first[0]] - levels[before[0]])
+            crossing[first[0] == 0] = levels[0]
+            crossing[~above.any(axis=0)] = np.nan
+            crossing.flags.writeable = False
+            self._crossings[key] = crossing
+        return crossing
@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+from heatwave import core
+from heatwave.figures import map_rasteriser
+from heatwave.regions import available_boundaries
+from heatwave.store import DerivedBuffer
+from heatwave.schema import WARMING_SCENARIOS, scenario_column
+from heatwave.warming import scenario_for_level, scenario_label
+from telemetry import view as profiling
 
 # Set page config
 st.set_page_config(page_title="UK Heatwave Projections", layout="wide")
 
+# Stage timings and chart sizes; a no-op unless DASHBOARD_PROFILE is set
+profile = profiling.start("heatwave")
+
 # Remove whitespace and branding
 st.markdown("""
 <style>
@@ -61,7 +69,7 @@ st.markdown(
             background: linear-gradient(135deg, #1a0000 0%, #330000 50%, #4d0000 100%);
             color: white;
         }
-        div.stMultiSelect label, div.stSelectbox label, div.stSlider label {
+        div.stMultiSelect label, div.stSelectbox label, div.stSlider label, div.stRadio label {
             color: white !important;
             font-weight: bold !important;
         }
@@ -86,15 +94,38 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Load data
-@st.cache_data
+# Load data (parsed once into the columnar cache, then memory-mapped).
+# cache_resource shares one read-only dataset across sessions without copying it;
+# all computation lives in heatwave.core and this script only lays it out.
+@st.cache_resource
 def load_data():
-    df = pd.read_csv('Annual_Count_of_Hot_Days___Projections__12km_grid__-7336973101011391426.csv', 
-                     encoding='utf-8-sig')
-    return df
+    return core.load()
+
+def lazy_section(title, key, expanded=False):
+    """Collapsible section whose content is only built while it is open.
+
+    Toggling the expander triggers a rerun, so callers check ``.open`` and skip
+    building (and shipping) figures for collapsed sections.
+    """
+    return st.expander(f"**{title}**", expanded=expanded, key=key, on_change="rerun")
+
+def session_buffer(size):
+    buffer = st.session_state.get('derived_buffer')
+    if buffer is None or buffer.size != size:
+        buffer = st.session_state['derived_buffer'] = DerivedBuffer(size)
+    return buffer
 
 try:
-    df = load_data()
+    with profile.stage('load'):
+        data = load_data()
+    # Scraped with the rerun metrics; read lazily, so no rasteriser is built here
+    profiling.register_cache("heatwave", "figures", data.figures.stats)
+    if data.backend == 'raster':
+        profiling.register_cache("heatwave", "raster_disk", lambda: map_rasteriser(data.store).stats())
+    store = data.store
+    buffer = session_buffer(store.size)
+    latitude = store.column('Latitude')
+    longitude = store.column('Longitude')
     
     # Title
     st.markdown("<h1 style='text-align: center; color: #ff6b35;'>🔥 UK Hot Summer Days Projections 🔥</h1>", unsafe_allow_html=True)
@@ -125,11 +156,11 @@ try:
     st.markdown("### 📊 Dataset Overview")
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Grid Points", f"{len(df):,}")
+        st.metric("Total Grid Points", f"{store.size:,}")
     with col2:
-        st.metric("Lat Range", f"{df['Latitude'].min():.1f}° to {df['Latitude'].max():.1f}°")
+        st.metric("Lat Range", f"{latitude.min():.1f}° to {latitude.max():.1f}°")
     with col3:
-        st.metric("Long Range", f"{df['Longitude'].min():.1f}° to {df['Longitude'].max():.1f}°")
+        st.metric("Long Range", f"{longitude.min():.1f}° to {longitude.max():.1f}°")
     with col4:
         st.metric("Warming Scenarios", "5 (1.5°C to 4°C)")
     
@@ -137,14 +168,22 @@ try:
     
     # Interactive Filters
     st.markdown("### 🎛️ Filter Data")
+    continuous = st.toggle("Continuous warming level", key="continuous_warming",
+                           help="Interpolate between the modelled scenarios, e.g. 2.7°C")
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        warming_scenario = st.selectbox(
-            "Select Warming Scenario",
-            ['1.5°C', '2°C', '2.5°C', '3°C', '4°C'],
-            index=2
-        )
+        if continuous:
+            # Levels between the modelled scenarios are interpolated per cell
+            warming_level = st.slider("Warming Level", 1.5, 4.0, 2.5, 0.1, format="%.1f°C", key="warming_level")
+            warming_scenario = scenario_for_level(warming_level)
+        else:
+            warming_scenario = st.selectbox(
+                "Select Warming Scenario",
+                ['1.5°C', '2°C', '2.5°C', '3°C', '4°C'],
+                index=2
+            )
+        warming_label = scenario_label(warming_scenario)
     
     with col2:
         confidence_level = st.selectbox(
@@ -160,19 +199,20 @@ try:
             index=0
         )
     
-    # Create column names based on selections
-    scenario_col = f'HSD {warming_scenario} {confidence_level}'
-    baseline_col = f'HSD baseline {baseline} {confidence_level}'
-    
-    # Calculate change
-    df['change'] = df[scenario_col] - df[baseline_col]
-    df['change_pct'] = ((df[scenario_col] - df[baseline_col]) / (df[baseline_col] + 0.001)) * 100
-    
-    # Calculate statistics
-    current_avg = df[baseline_col].mean()
-    future_avg = df[scenario_col].mean()
-    increase = future_avg - current_avg
-    increase_pct = (increase / (current_avg + 0.001)) * 100
+    # Derived columns and statistics are precomputed for every modelled
+    # selection; warming levels in between are interpolated on demand
+    selection = core.Selection(warming_scenario, confidence_level, baseline)
+    with profile.stage('summarise'):
+        stats = core.summarise(selection, data)
+    with profile.stage('derive'):
+        derived = core.derive(selection, data)
+    scenario_col = derived['scenario_col']
+    baseline_col = derived['baseline_col']
+    
+    current_avg = stats['current_avg']
+    future_avg = stats['future_avg']
+    increase = stats['increase']
+    increase_pct = stats['increase_pct']
     
     # Display key metrics
     st.markdown("### 🔥 Key Projections")
@@ -192,7 +232,7 @@ try:
             <div style='text-align: center; padding: 20px; background-color: rgba(255, 69, 0, 0.3); border-radius: 10px; border: 2px solid #ff4500;'>
                 <h2 style='color: #ff4500; margin: 0;'>{future_avg:.1f}</h2>
                 <p style='color: white; margin: 5px 0; font-size: 14px; font-weight: bold;'>Projected Hot Days/Year</p>
-                <p style='color: #ff9966; font-size: 11px;'>({warming_scenario} warming)</p>
+                <p style='color: #ff9966; font-size: 11px;'>({warming_label} warming)</p>
             </div>
         """, unsafe_allow_html=True)
     
@@ -216,315 +256,17 @@ try:
     
     st.markdown("<br><br>", unsafe_allow_html=True)
     
-    # ============ MAP 1: Current Projected Hot Days ============
-    fig_map1 = px.scatter_mapbox(
-        df,
-        lat='Latitude',
-        lon='Longitude',
-        color=scenario_col,
-        size=scenario_col,
-        color_continuous_scale='Hot',
-        mapbox_style='carto-darkmatter',
-        zoom=4.5,
-        center={'lat': 54, 'lon': -2},
-        title=f'<b>Projected Hot Days: {warming_scenario} Warming ({confidence_level})</b>',
-        hover_data={
-            'Latitude': ':.2f',
-            'Longitude': ':.2f',
-            scenario_col: ':.1f',
-            baseline_col: ':.1f'
-        },
-        height=550
-    )
-    
-    fig_map1.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=12),
-        title_x=0.5,
-        title_font=dict(size=16, color='white'),
-        coloraxis_colorbar=dict(
-            title=dict(text='Hot Days/Year', font=dict(color='white', size=12)),
-            tickfont=dict(color='white')
-        ),
-        margin=dict(l=0, r=0, t=40, b=0)
-    )
-    
-    # ============ MAP 2: Baseline (Historical) Hot Days ============
-    fig_map2 = px.scatter_mapbox(
-        df,
-        lat='Latitude',
-        lon='Longitude',
-        color=baseline_col,
-        size=baseline_col,
-        color_continuous_scale='Blues',
-        mapbox_style='carto-darkmatter',
-        zoom=4.5,
-        center={'lat': 54, 'lon': -2},
-        title=f'<b>Baseline Hot Days: {baseline}</b>',
-        hover_data={
-            'Latitude': ':.2f',
-            'Longitude': ':.2f',
-            baseline_col: ':.1f'
-        },
-        height=550
-    )
-    
-    fig_map2.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=12),
-        title_x=0.5,
-        title_font=dict(size=16, color='white'),
-        coloraxis_colorbar=dict(
-            title=dict(text='Hot Days/Year', font=dict(color='white', size=12)),
-            tickfont=dict(color='white')
-        ),
-        margin=dict(l=0, r=0, t=40, b=0)
-    )
-    
-    # ============ MAP 3: Change Map (Difference) ============
-    fig_map3 = px.scatter_mapbox(
-        df,
-        lat='Latitude',
-        lon='Longitude',
-        color='change',
-        size=abs(df['change']) + 0.1,
-        color_continuous_scale='RdYlBu_r',
-        mapbox_style='carto-darkmatter',
-        zoom=4.5,
-        center={'lat': 54, 'lon': -2},
-        title=f'<b>Increase in Hot Days: {warming_scenario} vs Baseline</b>',
-        hover_data={
-            'Latitude': ':.2f',
-            'Longitude': ':.2f',
-            'change': ':.1f',
-            scenario_col: ':.1f',
-            baseline_col: ':.1f'
-        },
-        height=550
-    )
-    
-    fig_map3.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=12),
-        title_x=0.5,
-        title_font=dict(size=16, color='white'),
-        coloraxis_colorbar=dict(
-            title=dict(text='Change (days/year)', font=dict(color='white', size=12)),
-            tickfont=dict(color='white')
-        ),
-        margin=dict(l=0, r=0, t=40, b=0)
-    )
-    
-    # ============ MAP 4: Density Heatmap ============
-    fig_map4 = px.density_mapbox(
-        df,
-        lat='Latitude',
-        lon='Longitude',
-        z=scenario_col,
-        radius=15,
-        mapbox_style='carto-darkmatter',
-        zoom=4.5,
-        center={'lat': 54, 'lon': -2},
-        title=f'<b>Heat Intensity Map: {warming_scenario} Warming</b>',
-        color_continuous_scale='Hot',
-        height=550
-    )
-    
-    fig_map4.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=12),
-        title_x=0.5,
-        title_font=dict(size=16, color='white'),
-        coloraxis_colorbar=dict(
-            title=dict(text='Hot Days/Year', font=dict(color='white', size=12)),
-            tickfont=dict(color='white')
-        ),
-        margin=dict(l=0, r=0, t=40, b=0)
-    )
-    
-    # ============ MAP 5: Percentage Change Map ============
-    # Filter out extreme outliers for better visualization
-    df_filtered = df[df['change_pct'] < 1000].copy()
-    
-    fig_map5 = px.scatter_mapbox(
-        df_filtered,
-        lat='Latitude',
-        lon='Longitude',
-        color='change_pct',
-        size=abs(df_filtered['change_pct']) + 1,
-        color_continuous_scale='Plasma',
-        mapbox_style='carto-darkmatter',
-        zoom=4.5,
-        center={'lat': 54, 'lon': -2},
-        title=f'<b>Percentage Increase in Hot Days</b>',
-        hover_data={
-            'Latitude': ':.2f',
-            'Longitude': ':.2f',
-            'change_pct': ':.0f',
-            scenario_col: ':.1f',
-            baseline_col: ':.1f'
-        },
-        height=550
-    )
-    
-    fig_map5.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=12),
-        title_x=0.5,
-        title_font=dict(size=16, color='white'),
-        coloraxis_colorbar=dict(
-            title=dict(text='% Increase', font=dict(color='white', size=12)),
-            tickfont=dict(color='white')
-        ),
-        margin=dict(l=0, r=0, t=40, b=0)
-    )
-    
-    # ============ CHART: Comparison Across Warming Scenarios ============
-    warming_scenarios = ['1.5°C', '2°C', '2.5°C', '3°C', '4°C']
-    scenario_data = []
-    
-    for scenario in warming_scenarios:
-        col_name = f'HSD {scenario} {confidence_level}'
-        scenario_data.append({
-            'Scenario': scenario,
-            'Average Hot Days': df[col_name].mean(),
-            'Maximum': df[col_name].max(),
-            'Minimum': df[col_name].min()
-        })
-    
-    scenario_df = pd.DataFrame(scenario_data)
-    
-    fig_bar = go.Figure()
-    
-    fig_bar.add_trace(go.Bar(
-        name='Average',
-        x=scenario_df['Scenario'],
-        y=scenario_df['Average Hot Days'],
-        marker_color='#ff6b35',
-        text=scenario_df['Average Hot Days'].round(1),
-        textposition='outside',
-        textfont=dict(color='white', size=13)
-    ))
-    
-    fig_bar.add_trace(go.Scatter(
-        name='Maximum',
-        x=scenario_df['Scenario'],
-        y=scenario_df['Maximum'],
-        mode='lines+markers',
-        line=dict(color='#dc143c', width=3),
-        marker=dict(size=10)
-    ))
-    
-    fig_bar.add_trace(go.Scatter(
-        name='Minimum',
-        x=scenario_df['Scenario'],
-        y=scenario_df['Minimum'],
-        mode='lines+markers',
-        line=dict(color='#ff9966', width=3),
-        marker=dict(size=10)
-    ))
-    
-    fig_bar.update_layout(
-        title='<b>Hot Days Across Warming Scenarios</b>',
-        title_x=0.5,
-        title_font=dict(size=16, color='white'),
-        xaxis_title='Warming Scenario',
-        yaxis_title='Hot Days per Year',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=12),
-        height=550,
-        xaxis=dict(
-            gridcolor='rgba(255,255,255,0.1)',
-            tickfont=dict(color='white'),
-            title_font=dict(color='white')
-        ),
-        yaxis=dict(
-            gridcolor='rgba(255,255,255,0.1)',
-            tickfont=dict(color='white'),
-            title_font=dict(color='white')
-        ),
-        legend=dict(font=dict(color='white'))
-    )
-    
-    # ============ CHART: Regional Breakdown ============
-    # Create regions
-    regions_data = []
-    regions = {
-        'Scotland': (df['Latitude'] >= 55),
-        'Northern England': (df['Latitude'] >= 53) & (df['Latitude'] < 55),
-        'Midlands': (df['Latitude'] >= 52) & (df['Latitude'] < 53),
-        'Southern England': (df['Latitude'] < 52)
-    }
-    
-    for region_name, mask in regions.items():
-        region_df = df[mask]
-        regions_data.append({
-            'Region': region_name,
-            'Baseline': region_df[baseline_col].mean(),
-            'Projected': region_df[scenario_col].mean(),
-            'Change': region_df['change'].mean()
-        })
-    
-    regions_df = pd.DataFrame(regions_data)
-    
-    fig_regions = go.Figure()
-    
-    fig_regions.add_trace(go.Bar(
-        name='Baseline',
-        x=regions_df['Region'],
-        y=regions_df['Baseline'],
-        marker_color='#4169e1',
-        text=regions_df['Baseline'].round(1),
-        textposition='outside',
-        textfont=dict(color='white', size=12)
-    ))
-    
-    fig_regions.add_trace(go.Bar(
-        name='Projected',
-        x=regions_df['Region'],
-        y=regions_df['Projected'],
-        marker_color='#ff4500',
-        text=regions_df['Projected'].round(1),
-        textposition='outside',
-        textfont=dict(color='white', size=12)
-    ))
-    
-    fig_regions.update_layout(
-        title=f'<b>Regional Breakdown: {warming_scenario} Warming</b>',
-        title_x=0.5,
-        title_font=dict(size=16, color='white'),
-        xaxis_title='Region',
-        yaxis_title='Hot Days per Year',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=12),
-        height=550,
-        barmode='group',
-        xaxis=dict(
-            tickfont=dict(color='white'),
-            showgrid=False,
-            title_font=dict(color='white')
-        ),
-        yaxis=dict(
-            gridcolor='rgba(255,255,255,0.1)',
-            tickfont=dict(color='white'),
-            title_font=dict(color='white')
-        ),
-        legend=dict(font=dict(color='white'))
-    )
+    # ============ MAPS 1-5: served from the figure cache, built on demand ============
+    def map_figure(kind):
+        with profile.stage(f'figure:{kind}'):
+            return core.build_figures(selection, (kind,), data, buffer)[kind]
     
     # ============ Display Section 1: Side-by-Side Comparison Maps ============
     st.markdown("### 🗺️ Geographic Comparison: Baseline vs Future")
     col1, col2 = st.columns(2)
     
     with col1:
-        st.plotly_chart(fig_map2, use_container_width=True)
+        profiling.plotly_chart(profile, 'baseline', map_figure('baseline'), use_container_width=True)
         st.markdown("""
             <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
             <b style='color: #4169e1;'>Historical Context:</b> The baseline map (blue scale) shows historical hot days were relatively rare across most of the UK, 
@@ -534,7 +276,7 @@ try:
         """, unsafe_allow_html=True)
     
     with col2:
-        st.plotly_chart(fig_map1, use_container_width=True)
+        profiling.plotly_chart(profile, 'projected', map_figure('projected'), use_container_width=True)
         st.markdown("""
             <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
             <b style='color: #ff6b35;'>Future Projections:</b> Under warming scenarios, the transformation is dramatic. The red-orange "hot" scale 
@@ -544,89 +286,247 @@ try:
         """, unsafe_allow_html=True)
     
     # ============ Display Section 2: Change & Intensity Maps ============
-    st.markdown("### 🔥 Change Analysis: Where Heat Will Increase Most")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.plotly_chart(fig_map3, use_container_width=True)
-        st.markdown("""
-            <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
-            <b style='color: #dc143c;'>Absolute Change:</b> This difference map shows the raw increase in hot days per year. Red areas indicate 
-            the largest absolute increases—some regions could see 10+ additional extremely hot days per year. 
-            Southern England faces the most severe changes, while Scotland shows more moderate increases.
-            </p>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.plotly_chart(fig_map4, use_container_width=True)
-        st.markdown("""
-            <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
-            <b style='color: #ff6b35;'>Heat Intensity Zones:</b> The density heatmap reveals geographic clustering of extreme heat. 
-            Bright red zones indicate areas where multiple grid points show very high values—these are the future 
-            "heat islands" where infrastructure, health services, and cooling systems will face maximum stress.
-            </p>
-        """, unsafe_allow_html=True)
-    
+    section = lazy_section("🔥 Change Analysis: Where Heat Will Increase Most", key="section_change")
+    if section.open:
+        with section:
+            ctrl1, ctrl2 = st.columns(2)
+            with ctrl1:
+                # For the crossing map: lowest warming level at which each cell passes it
+                threshold = st.number_input("Hot days/year threshold", min_value=1, max_value=60,
+                                            value=core.DEFAULT_THRESHOLD, step=1, key="crossing_threshold")
+            with ctrl2:
+                # Spread figures are cached per metric, so flipping views rebuilds nothing
+                spread_view = st.toggle("Show uncertainty spread", key="spread_view",
+                                        help="Compare the lower, median and upper projections")
+                if spread_view:
+                    spread_metric = st.radio(
+                        "Spread view",
+                        options=core.SPREAD_METRICS,
+                        format_func=lambda m: {'spread': 'Upper - lower', 'relative': 'Relative to change',
+                                               'agreement': 'Where bands agree'}[m],
+                        horizontal=True,
+                        key="spread_metric"
+                    )
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                if spread_view:
+                    with profile.stage('figure:spread'):
+                        fig_spread = core.build_figures(selection, ('spread',), data, buffer,
+                                                        spread_metric=spread_metric)['spread']
+                    profiling.plotly_chart(profile, 'spread', fig_spread, use_container_width=True)
+                    st.markdown("""
+                        <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
+                        <b style='color: #9d4edd;'>How Sure Are We?</b> The lower and upper projections bracket the likely range. 
+                        A wide spread means the increase could be much smaller or much larger than the median; 
+                        the agreement view keeps only the places where all three projections change the same way.
+                        </p>
+                    """, unsafe_allow_html=True)
+                    st.dataframe(
+                        core.spread(selection, data)['table'],
+                        hide_index=True, use_container_width=True,
+                        column_config={
+                            'Mean spread (days)': st.column_config.NumberColumn(format="%.1f"),
+                            'Median relative spread (%)': st.column_config.NumberColumn(format="%.0f%%"),
+                            'Bands agree (% of grid)': st.column_config.ProgressColumn(
+                                format="%.1f%%", min_value=0, max_value=100),
+                        }
+                    )
+                else:
+                    profiling.plotly_chart(profile, 'change', map_figure('change'), use_container_width=True)
+                    st.markdown("""
+                        <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
+                        <b style='color: #dc143c;'>Absolute Change:</b> This difference map shows the raw increase in hot days per year. Red areas indicate 
+                        the largest absolute increases—some regions could see 10+ additional extremely hot days per year. 
+                        Southern England faces the most severe changes, while Scotland shows more moderate increases.
+                        </p>
+                    """, unsafe_allow_html=True)
+            
+            with col2:
+                with profile.stage('figure:crossing'):
+                    fig_crossing = core.build_figures(selection, ('crossing',), data, buffer,
+                                                      threshold=threshold)['crossing']
+                profiling.plotly_chart(profile, 'crossing', fig_crossing, use_container_width=True)
+                st.markdown(f"""
+                    <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
+                    <b style='color: #ffd700;'>When Does It Arrive?</b> Each point shows the global warming level at which that location 
+                    first sees {threshold} or more hot days a year ({confidence_level} projection). Red areas get there early; 
+                    places with no point stay below {threshold} days even at 4°C.
+                    </p>
+                """, unsafe_allow_html=True)
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                profiling.plotly_chart(profile, 'density', map_figure('density'), use_container_width=True)
+                st.markdown("""
+                    <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
+                    <b style='color: #ff6b35;'>Heat Intensity Zones:</b> The density heatmap reveals geographic clustering of extreme heat. 
+                    Bright red zones indicate areas where multiple grid points show very high values—these are the future 
+                    "heat islands" where infrastructure, health services, and cooling systems will face maximum stress.
+                    </p>
+                """, unsafe_allow_html=True)
+            
+            with col2:
+                st.markdown(f"**Share of the UK grid with {threshold}+ hot days/year, by warming level**")
+                st.dataframe(
+                    core.crossing(threshold, confidence_level, data)['reached'],
+                    hide_index=True, use_container_width=True,
+                    column_config={'Share of grid (%)': st.column_config.ProgressColumn(
+                        format="%.1f%%", min_value=0, max_value=100)}
+                )
+            
     # ============ Display Section 3: Statistical Analysis ============
-    st.markdown("### 📊 Statistical Analysis & Regional Patterns")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.plotly_chart(fig_map5, use_container_width=True)
-        st.markdown("""
-            <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
-            <b style='color: #9d4edd;'>Relative Change:</b> Percentage increases tell a different story than absolute numbers. Areas starting 
-            from near-zero baselines show dramatic percentage jumps (purple/yellow zones). While southern regions 
-            have higher absolute values, northern areas may experience greater relative disruption to established norms.
-            </p>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.plotly_chart(fig_bar, use_container_width=True)
-        st.markdown("""
-            <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
-            <b style='color: #ff6b35;'>Non-Linear Escalation:</b> The relationship between warming and hot days accelerates dramatically. 
-            The gap between 3°C and 4°C scenarios is far larger than 1.5°C to 2°C—demonstrating that every fraction 
-            of a degree matters immensely. Maximum values (red line) reach extreme levels under 4°C warming.
-            </p>
-        """, unsafe_allow_html=True)
-    
+    section = lazy_section("📊 Statistical Analysis & Regional Patterns", key="section_statistics")
+    if section.open:
+        with section:
+            # ============ CHART: Comparison Across Warming Scenarios ============
+            with profile.stage('figure:scenarios'):
+                fig_bar = core.build_figures(selection, ('scenarios',), data)['scenarios']
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                profiling.plotly_chart(profile, 'change_pct', map_figure('change_pct'), use_container_width=True)
+                st.markdown("""
+                    <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
+                    <b style='color: #9d4edd;'>Relative Change:</b> Percentage increases tell a different story than absolute numbers. Areas starting 
+                    from near-zero baselines show dramatic percentage jumps (purple/yellow zones). While southern regions 
+                    have higher absolute values, northern areas may experience greater relative disruption to established norms.
+                    </p>
+                """, unsafe_allow_html=True)
+            
+            with col2:
+                profiling.plotly_chart(profile, 'scenarios', fig_bar, use_container_width=True)
+                st.markdown("""
+                    <p style='color: white; font-size: 14px; line-height: 1.6; padding: 10px; background-color: rgba(0,0,0,0.5); border-radius: 5px;'>
+                    <b style='color: #ff6b35;'>Non-Linear Escalation:</b> The relationship between warming and hot days accelerates dramatically. 
+                    The gap between 3°C and 4°C scenarios is far larger than 1.5°C to 2°C—demonstrating that every fraction 
+                    of a degree matters immensely. Maximum values (red line) reach extreme levels under 4°C warming.
+                    </p>
+                """, unsafe_allow_html=True)
+            
     # ============ Display Section 4: Regional Breakdown ============
-    st.markdown("### 🏴󠁧󠁢󠁥󠁮󠁧󠁿 Regional Impact Analysis")
-    col1, col2 = st.columns([1, 1])
-    
-    with col1:
-        st.plotly_chart(fig_regions, use_container_width=True)
-    
-    with col2:
-        st.markdown("""
-            <div style='padding: 20px; background-color: rgba(0,0,0,0.5); border-radius: 10px; border-left: 4px solid #ff6b35;'>
-            <h4 style='color: #ff6b35; margin-top: 0;'>Key Regional Insights</h4>
-            <p style='color: white; font-size: 14px; line-height: 1.8;'>
-            <b style='color: #4169e1;'>Scotland:</b> Starting from the lowest baseline, Scotland faces dramatic relative changes. 
-            Infrastructure and ecosystems adapted to cool climates will face unprecedented heat stress.<br><br>
+    section = lazy_section("🏴󠁧󠁢󠁥󠁮󠁧󠁿 Regional Impact Analysis", key="section_regions")
+    if section.open:
+        with section:
+            # ============ CHART: Regional Breakdown ============
+            boundaries = available_boundaries()
+            region_set = st.selectbox("Region Set", list(boundaries), index=0)
+            with profile.stage('figure:regions'):
+                fig_regions = core.build_figures(selection, ('regions',), data,
+                                                 boundary_path=boundaries[region_set])['regions']
             
-            <b style='color: #ff6b35;'>Northern England:</b> Shows moderate absolute increases but significant relative change. 
-            Urban areas like Manchester and Leeds will need substantial adaptation measures.<br><br>
+            col1, col2 = st.columns([1, 1])
             
-            <b style='color: #ffd700;'>Midlands:</b> The transition zone experiences both absolute and relative increases. 
-            Critical transport and industrial infrastructure concentrated here faces compounding heat risks.<br><br>
+            with col1:
+                profiling.plotly_chart(profile, 'regions', fig_regions, use_container_width=True)
+            
+            with col2:
+                st.markdown("""
+                    <div style='padding: 20px; background-color: rgba(0,0,0,0.5); border-radius: 10px; border-left: 4px solid #ff6b35;'>
+                    <h4 style='color: #ff6b35; margin-top: 0;'>Key Regional Insights</h4>
+                    <p style='color: white; font-size: 14px; line-height: 1.8;'>
+                    <b style='color: #ff4500;'>England:</b> The only nation with a measurable baseline of hot days, and the one 
+                    with the largest increases: an area-weighted average of around 14 extra days a year under 4°C warming, led by 
+                    London, the South East and the East of England. Cities here will require comprehensive cooling strategies and public 
+                    health interventions.<br><br>
+            
+                    <b style='color: #ffd700;'>Wales:</b> Roughly half England's increase, concentrated in the lowland south 
+                    and east along the border and the Severn. Upland areas stay close to their current baseline until the 
+                    higher warming scenarios.<br><br>
+            
+                    <b style='color: #4169e1;'>Scotland:</b> Starting from a baseline of almost no hot days, Scotland faces 
+                    dramatic relative changes even though absolute numbers stay low. Infrastructure and ecosystems adapted to 
+                    cool climates will face unprecedented heat stress.<br><br>
+            
+                    <b style='color: #ff6b35;'>Northern Ireland:</b> Like Scotland, a near-zero baseline with only a day or two 
+                    a year by 4°C, so the first hot days will arrive in places with little experience of them.
+                    </p>
+                    </div>
+                """, unsafe_allow_html=True)
+            
+    # ============ Display Section 5: Location lookup ============
+    section = lazy_section("📍 Hot Days at Your Location", key="section_lookup")
+    if section.open:
+        with section:
+            locator = data.locator
+            col1, col2 = st.columns(2)
+            with col1:
+                query_lat = st.number_input("Latitude", value=51.5074, min_value=49.0, max_value=61.0, format="%.4f")
+            with col2:
+                query_lon = st.number_input("Longitude", value=-0.1278, min_value=-9.0, max_value=3.0, format="%.4f")
+            
+            record = locator.record(query_lat, query_lon)
+            if record is None:
+                st.warning("No grid cell within reach of that point - is it out at sea or outside the UK?")
+            else:
+                st.markdown(f"Nearest {locator.grid.dx / 1000:.0f} km cell centre: **{record['Latitude']:.2f}°N, {record['Longitude']:.2f}°** "
+                            f"({record['distance_m'] / 1000:.1f} km away)")
+                lookup_cols = st.columns(len(WARMING_SCENARIOS) + 1)
+                with lookup_cols[0]:
+                    st.metric(f"Baseline {baseline}", f"{record[baseline_col]:.1f}")
+                for col, scenario in zip(lookup_cols[1:], WARMING_SCENARIOS):
+                    with col:
+                        value = record[scenario_column(scenario, confidence_level)]
+                        st.metric(scenario, f"{value:.1f}", f"{value - record[baseline_col]:+.1f}")
+            
+            st.markdown("**Batch lookup:** upload a CSV of sites with `Latitude` and `Longitude` columns.")
+            sites_file = st.file_uploader("Site list", type="csv", label_visibility="collapsed")
+            if sites_file is not None:
+                sites = pd.read_csv(sites_file)
+                if not {'Latitude', 'Longitude'} <= set(sites.columns):
+                    st.error("The CSV needs 'Latitude' and 'Longitude' columns.")
+                else:
+                    matches = locator.records(sites['Latitude'].to_numpy(), sites['Longitude'].to_numpy())
+                    result = pd.concat([sites.reset_index(drop=True),
+                                        matches.drop(columns=['query_latitude', 'query_longitude'])
+                                               .add_prefix('grid_')], axis=1)
+                    st.dataframe(result, use_container_width=True)
+                    st.download_button("Download results", result.to_csv(index=False),
+                                       file_name="hot_days_by_site.csv", mime="text/csv")
+    
+    # ============ Display Section 6: Data table ============
+    section = lazy_section("📋 Raw Data", key="section_table")
+    if section.open:
+        with section:
+            # Sorted, filtered and paged on the server; only one page is sent
+            table_col1, table_col2, table_col3, table_col4 = st.columns(4)
+            with table_col1:
+                sort_by = st.selectbox(
+                    "Sort by",
+                    options=core.TABLE_COLUMNS,
+                    index=core.TABLE_COLUMNS.index('projected'),
+                    format_func=lambda c: {'baseline': baseline_col, 'projected': scenario_col}.get(c, c),
+                    key="table_sort"
+                )
+            with table_col2:
+                descending = st.toggle("Largest first", value=True, key="table_descending")
+            with table_col3:
+                south, north = float(np.floor(latitude.min())), float(np.ceil(latitude.max()))
+                latitude_range = st.slider("Latitude", south, north, (south, north), 0.1,
+                                           format="%.1f°N", key="table_latitude")
+            with table_col4:
+                page_number = st.number_input("Page", min_value=1, value=1, step=1, key="table_page")
+            
+            with profile.stage('table'):
+                table = core.table_page(selection, sort_by, descending, page_number - 1,
+                                        latitude=latitude_range, data=data)
+            st.dataframe(
+                table['rows'],
+                hide_index=True, use_container_width=True,
+                column_config={
+                    # Drawn in the browser from the values, unlike per-cell Styler CSS
+                    table['scenario_col']: st.column_config.ProgressColumn(
+                        format="%.1f", min_value=0, max_value=max(table['scale'], 1)),
+                    'change': st.column_config.NumberColumn(format="%.1f"),
+                    'change_pct': st.column_config.NumberColumn(format="%.0f%%"),
+                }
+            )
+            first_row = table['page'] * core.PAGE_SIZE
+            st.caption(f"Rows {min(first_row + 1, table['total']):,}-{min(first_row + core.PAGE_SIZE, table['total']):,} "
+                       f"of {table['total']:,} · page {table['page'] + 1} of {table['pages']}")
             
-            <b style='color: #ff4500;'>Southern England:</b> Already experiencing the most hot days in baseline period, this region 
-            faces the highest absolute increases. London and southeastern cities will require comprehensive 
-            cooling strategies and public health interventions.
-            </p>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    # Data table
-    st.markdown("### 📋 Raw Data Sample")
-    display_cols = ['Latitude', 'Longitude', baseline_col, scenario_col, 'change', 'change_pct']
-    st.dataframe(
-        df[display_cols].head(30).style.background_gradient(cmap='Reds', subset=[scenario_col]),
-        use_container_width=True
-    )
-    
     # Summary statistics
     st.markdown("### 📈 Summary Statistics")
     stats_col1, stats_col2, stats_col3 = st.columns(3)
@@ -635,8 +535,8 @@ try:
         st.markdown(f"""
             <div style='padding: 15px; background-color: rgba(255, 107, 53, 0.3); border-radius: 8px; border: 2px solid #ff6b35;'>
                 <h4 style='color: #ff6b35; margin: 0;'>Most Affected Area</h4>
-                <p style='color: white; margin: 10px 0 5px 0; font-size: 18px; font-weight: bold;'>{df.loc[df[scenario_col].idxmax(), 'Latitude']:.2f}°N, {df.loc[df[scenario_col].idxmax(), 'Longitude']:.2f}°W</p>
-                <p style='color: white; font-size: 14px; margin: 0;'>{df[scenario_col].max():.1f} hot days/year projected</p>
+                <p style='color: white; margin: 10px 0 5px 0; font-size: 18px; font-weight: bold;'>{stats['max_projected_location'][0]:.2f}°N, {stats['max_projected_location'][1]:.2f}°W</p>
+                <p style='color: white; font-size: 14px; margin: 0;'>{stats['max_projected']:.1f} hot days/year projected</p>
             </div>
         """, unsafe_allow_html=True)
     
@@ -644,13 +544,13 @@ try:
         st.markdown(f"""
             <div style='padding: 15px; background-color: rgba(255, 69, 0, 0.3); border-radius: 8px; border: 2px solid #ff4500;'>
                 <h4 style='color: #ff4500; margin: 0;'>Largest Increase</h4>
-                <p style='color: white; margin: 10px 0 5px 0; font-size: 18px; font-weight: bold;'>{df.loc[df['change'].idxmax(), 'Latitude']:.2f}°N, {df.loc[df['change'].idxmax(), 'Longitude']:.2f}°W</p>
-                <p style='color: white; font-size: 14px; margin: 0;'>+{df['change'].max():.1f} days/year increase</p>
+                <p style='color: white; margin: 10px 0 5px 0; font-size: 18px; font-weight: bold;'>{stats['max_change_location'][0]:.2f}°N, {stats['max_change_location'][1]:.2f}°W</p>
+                <p style='color: white; font-size: 14px; margin: 0;'>+{stats['max_change']:.1f} days/year increase</p>
             </div>
         """, unsafe_allow_html=True)
     
     with stats_col3:
-        median_change = df['change'].median()
+        median_change = stats['median_change']
         st.markdown(f"""
             <div style='padding: 15px; background-color: rgba(220, 20, 60, 0.3); border-radius: 8px; border: 2px solid #dc143c;'>
                 <h4 style='color: #dc143c; margin: 0;'>Median UK Change</h4>
@@ -658,7 +558,29 @@ try:
                 <p style='color: white; font-size: 14px; margin: 0;'>Typical increase across UK</p>
             </div>
         """, unsafe_allow_html=True)
-    
+
+    # ============ TOP 10: ranked slices of the precomputed extremes ============
+    section = lazy_section("🏆 10 Most Affected Areas", key="section_ranking")
+    if section.open:
+        with section:
+            rank_col1, rank_col2 = st.columns(2)
+
+            with rank_col1:
+                st.markdown(f"**Most hot days projected ({warming_label})**")
+                st.dataframe(
+                    core.top_cells(selection, 'projected', k=10, data=data).rename(columns={scenario_col: 'Hot Days/Year'}),
+                    hide_index=True, use_container_width=True,
+                    column_config={'Hot Days/Year': st.column_config.NumberColumn(format="%.1f")}
+                )
+
+            with rank_col2:
+                st.markdown(f"**Largest increase vs {baseline}**")
+                st.dataframe(
+                    core.top_cells(selection, 'change', k=10, data=data).rename(columns={'change': 'Increase (days/year)'}),
+                    hide_index=True, use_container_width=True,
+                    column_config={'Increase (days/year)': st.column_config.NumberColumn(format="%.1f")}
+                )
+
     # Footer
     st.markdown(
         """
@@ -691,3 +613,5 @@ except FileNotFoundError:
 except Exception as e:
     st.error(f"❌ Error loading data: {str(e)}")
     st.info("Check the Streamlit Cloud logs for more details about what went wrong.")
+
+profiling.finish(profile)
@@ -0,0 +1 @@
+"""Data and compute helpers for the 2013 Montreal election dashboard."""
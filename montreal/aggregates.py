@@ -0,0 +1,49 @@
+"""Per-(result, winner) group totals for answering filter selections.
+
+The two dashboard filters select whole (result, winner) groups, so every
+number the dashboard shows for a selection is a sum over a handful of
+precomputed group rows.  The row positions of each group are kept too, so
+the per-district charts can take their rows without re-evaluating ``isin``
+masks over the whole table.  The cost per selection depends on the number
+of groups, not the number of districts or polling stations.
+"""
+
+import numpy as np
+import pandas as pd
+
+GROUP_KEYS = ['result', 'winner']
+
+
+class GroupTotals:
+    """Counts and summed columns per (result, winner) group."""
+
+    def __init__(self, election, candidates, extra=('margin',)):
+        self.candidates = list(candidates)
+        summed = self.candidates + [name for name in extra if name in election.columns]
+        grouped = election.groupby(GROUP_KEYS, sort=True)
+        table = grouped[summed].sum()
+        table.insert(0, 'count', grouped.size())
+        self.table = table
+        self._positions = {key: np.asarray(rows) for key, rows in grouped.indices.items()}
+
+        # Each district's own winner's votes, summed per group
+        winner_votes = pd.Series(0, index=table.index, dtype=np.int64)
+        for candidate in self.candidates:
+            won = table.index.get_level_values('winner') == candidate
+            winner_votes[won] = table.loc[won, candidate]
+        self.table['winner_votes'] = winner_votes
+
+    def select(self, winners, results):
+        """Group rows for the selected winners and result types."""
+        index = self.table.index
+        keep = index.get_level_values('winner').isin(winners) & index.get_level_values('result').isin(results)
+        return self.table[keep]
+
+    def positions(self, winners, results):
+        """Sorted row positions of every district in the selected groups."""
+        parts = [self._positions[key] for key in self.select(winners, results).index]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+    def by_winner(self, groups):
+        """Collapse selected group rows to one row per winner."""
+        return groups.groupby(level='winner').sum()
@@ -0,0 +1,472 @@
+"""Headless entry points for the Montreal election dashboard.
+
+The filtering, aggregation and figure building that used to run at the top
+level of ``montrealelection_app.py`` are plain functions here, so they can be
+benchmarked or reused without a Streamlit server::
+
+    from montreal import core
+
+    selection = core.Selection(('Coderre', 'Joly'), ('plurality',))
+    core.summarise(selection)['filtered_total_votes']
+    figures = core.build_figures(selection)
+
+Each function takes an optional ``data`` argument (the result of ``load``,
+or any results table) and falls back to the bundled election, loaded once
+per process.
+"""
+
+from collections import namedtuple
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from .aggregates import GroupTotals
+from .flows import flow_links, link_nodes
+from .geometry import district_geojson
+from .margins import margin_columns
+
+# Consistent color scheme
+CANDIDATES = ('Coderre', 'Bergeron', 'Joly')
+COLORS = {'Coderre': '#6366F1', 'Bergeron': '#EF4444', 'Joly': '#10B981'}
+LINK_COLORS = {
+    'Coderre': 'rgba(99, 102, 241, 0.4)',
+    'Bergeron': 'rgba(239, 68, 68, 0.4)',
+    'Joly': 'rgba(16, 185, 129, 0.4)'
+}
+RESULT_TYPES = ('majority', 'plurality')
+
+Selection = namedtuple('Selection', ['winners', 'results'])
+
+DEFAULT_SELECTION = Selection(CANDIDATES, RESULT_TYPES)
+
+FIGURE_KINDS = ('overview', 'sankey', 'margins', 'performance')
+MAP_METRICS = ('winner', 'margin')
+
+
+def prepare(election):
+    """Attach placings and victory margins (see ``margins``) to a results table."""
+    return election.join(margin_columns(election, CANDIDATES))
+
+
+class Dataset:
+    """A results table plus everything derived from it once.
+
+    Works for any table with one row per district or polling station and
+    the ``CANDIDATES`` vote columns, ``total``, ``winner`` and ``result``.
+    """
+
+    def __init__(self, election):
+        if 'margin' not in election.columns:
+            election = prepare(election)
+        self.election = election
+        self.groups = GroupTotals(election, CANDIDATES)
+        self.winner_counts = election['winner'].value_counts()
+        self.total_votes = {c: election[c].sum() for c in CANDIDATES}
+        self.total_all_votes = sum(self.total_votes.values())
+
+
+_dataset = None
+
+
+def load():
+    """The per-district election results bundled with Plotly Express.
+
+    Placings, margins and group totals are computed once here, not per
+    selection.
+    """
+    global _dataset
+    if _dataset is None:
+        _dataset = Dataset(px.data.election())
+    return _dataset
+
+
+def _data(data):
+    if data is None:
+        return load()
+    return data if isinstance(data, Dataset) else Dataset(data)
+
+
+def _winners(selection):
+    return [c for c in CANDIDATES if c in selection.winners]
+
+
+def derive(selection, data=None):
+    """Districts matching the selection, with their placings and margins."""
+    data = _data(data)
+    # Rows come from the precomputed group positions; margins ride along
+    filtered = data.election.take(data.groups.positions(selection.winners, selection.results))
+    return {'filtered': filtered}
+
+
+def summarise(selection, data=None):
+    """District counts, vote totals and per-candidate performance.
+
+    Answered from the precomputed (result, winner) group totals.
+    """
+    data = _data(data)
+    groups = data.groups.select(selection.winners, selection.results)
+    per_winner = data.groups.by_winner(groups)
+
+    performance_data = []
+    for candidate in _winners(selection):
+        won = per_winner.loc[candidate] if candidate in per_winner.index else None
+        count = 0 if won is None else int(won['count'])
+        total = 0 if won is None else won['winner_votes']
+        performance_data.append({
+            'Candidate': candidate,
+            'Districts Won': count,
+            'Avg Votes': total / count if count else np.nan,
+            'Total Votes': total,
+            # A district's winner is its first place, so this is its margin
+            'Avg Margin': won['margin'] / count if count else np.nan
+        })
+
+    return {
+        'winner_counts': data.winner_counts,
+        'total_votes': data.total_votes,
+        'filtered_winner_counts': per_winner['count'],
+        'filtered_total_votes': {c: groups[c].sum() for c in CANDIDATES},
+        'result_winner_counts': groups['count'].reset_index(),
+        'performance': pd.DataFrame(performance_data),
+    }
+
+
+def _overview_figure(selection, summary):
+    winners = _winners(selection)
+    filtered_winner_counts = summary['filtered_winner_counts']
+    filtered_total_votes = summary['filtered_total_votes']
+
+    fig1 = make_subplots(
+        rows=2, cols=2,
+        specs=[[{"type": "pie"}, {"type": "pie"}],
+               [{"type": "bar", "colspan": 2}, None]],
+        subplot_titles=("<b style='color:white;'>Districts Won</b> (of 58)",
+                        "<b style='color:white;'>Popular Vote Share</b>",
+                        "<b style='color:white;'>Comparison: Districts Won vs Popular Vote</b>"),
+        vertical_spacing=0.15,
+        horizontal_spacing=0.12
+    )
+
+    # Districts Won Pie Chart
+    fig1.add_trace(go.Pie(
+        labels=winners,
+        values=[filtered_winner_counts.get(c, 0) for c in winners],
+        hole=0.4,
+        marker=dict(colors=[COLORS[c] for c in winners]),
+        texttemplate='<b>%{label}</b><br>%{value}<br>(%{percent})',
+        textfont=dict(size=12, family='Arial, sans-serif', color='white'),
+        hovertemplate='<b>%{label}</b><br>Districts: %{value}<br>%{percent}<extra></extra>',
+        showlegend=False
+    ), row=1, col=1)
+
+    # Popular Vote Pie Chart
+    fig1.add_trace(go.Pie(
+        labels=winners,
+        values=[filtered_total_votes[c] for c in winners],
+        hole=0.4,
+        marker=dict(colors=[COLORS[c] for c in winners]),
+        texttemplate='<b>%{label}</b><br>%{value:,}<br>(%{percent})',
+        textfont=dict(size=12, family='Arial, sans-serif', color='white'),
+        hovertemplate='<b>%{label}</b><br>Votes: %{value:,}<br>%{percent}<extra></extra>',
+        showlegend=False
+    ), row=1, col=2)
+
+    # Bar chart
+    for candidate in winners:
+        # Districts
+        fig1.add_trace(go.Bar(
+            name=candidate,
+            x=['Districts Won'],
+            y=[filtered_winner_counts.get(candidate, 0)],
+            marker_color=COLORS[candidate],
+            text=[f"<b>{filtered_winner_counts.get(candidate, 0)}</b>"],
+            textposition='outside',
+            textfont=dict(size=13, color='white'),
+            showlegend=True,
+            legendgroup=candidate
+        ), row=2, col=1)
+
+        # Popular Vote
+        fig1.add_trace(go.Bar(
+            name=candidate,
+            x=['Popular Vote (thousands)'],
+            y=[filtered_total_votes[candidate]/1000],
+            marker_color=COLORS[candidate],
+            text=[f"<b>{filtered_total_votes[candidate]:,}</b>"],
+            textposition='outside',
+            textfont=dict(size=13, color='white'),
+            showlegend=False,
+            legendgroup=candidate
+        ), row=2, col=1)
+
+    fig1.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', family='Arial'),
+        height=650,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.15,
+            xanchor="center",
+            x=0.5,
+            font=dict(color='white', size=12)
+        ),
+        margin=dict(l=40, r=40, t=80, b=80)
+    )
+
+    fig1.update_yaxes(
+        gridcolor='rgba(255,255,255,0.1)',
+        title_font=dict(color='white'),
+        tickfont=dict(color='white'),
+        row=2, col=1
+    )
+
+    fig1.update_xaxes(
+        title_font=dict(color='white'),
+        tickfont=dict(color='white'),
+        row=2, col=1
+    )
+
+    for annotation in fig1['layout']['annotations']:
+        annotation['font'] = dict(size=14, color='white')
+    return fig1
+
+
+def _sankey_figure(selection, summary):
+    winners = _winners(selection)
+    result_winner_counts = summary['result_winner_counts']
+
+    result_labels = {
+        'plurality': '<b>Plurality</b><br>(< 50% votes)',
+        'majority': '<b>Majority</b><br>(> 50% votes)'
+    }
+    flows = flow_links(result_winner_counts, [('result', list(result_labels)), ('winner', winners)])
+    all_labels = list(result_labels.values()) + [f'<b>{c}</b>' for c in winners]
+
+    # Each link takes the colour of its winner node
+    node_link_colors = np.array([''] * len(result_labels) + [LINK_COLORS[c] for c in winners], dtype=object)
+    link_colors = node_link_colors[link_nodes(flows, color_stage=1)].tolist()
+
+    fig2 = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=20,
+            thickness=25,
+            line=dict(color="white", width=0.5),
+            label=all_labels,
+            color=['#94A3B8', '#94A3B8'] + [COLORS[c] for c in winners],
+        ),
+        link=dict(
+            source=flows.source.tolist(),
+            target=flows.target.tolist(),
+            value=flows.value.tolist(),
+            color=link_colors
+        )
+    )])
+
+    fig2.update_layout(
+        title={
+            'text': "<b>How Candidates Won: Majority vs Plurality</b>",
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 18, 'color': 'white'}
+        },
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=12),
+        height=500,
+        margin=dict(l=20, r=20, t=60, b=40)
+    )
+    return fig2
+
+
+def _margins_figure(margins):
+    fig3 = px.scatter(
+        margins,
+        x='total',
+        y='margin_pct',
+        color='winner',
+        color_discrete_map=COLORS,
+        size='margin',
+        hover_data=['district', 'result'],
+        title='<b>Victory Margins Across Districts</b>',
+        labels={'total': 'Total Votes in District', 'margin_pct': 'Victory Margin (%)'}
+    )
+
+    fig3.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        height=450,
+        title_x=0.5,
+        title_font=dict(size=18),
+        xaxis=dict(
+            gridcolor='rgba(255,255,255,0.1)',
+            title_font=dict(color='white'),
+            tickfont=dict(color='white')
+        ),
+        yaxis=dict(
+            gridcolor='rgba(255,255,255,0.1)',
+            title_font=dict(color='white'),
+            tickfont=dict(color='white')
+        ),
+        legend=dict(font=dict(color='white'))
+    )
+    return fig3
+
+
+def _performance_figure(perf_df):
+    fig4 = go.Figure()
+    for i, candidate in enumerate(perf_df['Candidate']):
+        fig4.add_trace(go.Bar(
+            name=candidate,
+            x=['Districts Won', 'Avg Votes per District', 'Avg Victory Margin'],
+            y=[
+                perf_df.loc[i, 'Districts Won'],
+                perf_df.loc[i, 'Avg Votes'] / 100,  # Scale down for visibility
+                perf_df.loc[i, 'Avg Margin'] / 100   # Scale down for visibility
+            ],
+            marker_color=COLORS[candidate],
+            text=[
+                f"{perf_df.loc[i, 'Districts Won']:.0f}",
+                f"{perf_df.loc[i, 'Avg Votes']:.0f}",
+                f"{perf_df.loc[i, 'Avg Margin']:.0f}"
+            ],
+            textposition='outside',
+            textfont=dict(color='white', size=12),
+            hovertemplate=f'<b>{candidate}</b><br>%{{x}}: %{{text}}<extra></extra>'
+        ))
+
+    fig4.update_layout(
+        title={
+            'text': '<b>Candidate Performance Metrics</b>',
+            'x': 0.5,
+            'font': {'size': 18, 'color': 'white'}
+        },
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        height=450,
+        xaxis=dict(
+            tickfont=dict(color='white'),
+            showgrid=False
+        ),
+        yaxis=dict(
+            title='Scaled Values (÷100 for visibility)',
+            gridcolor='rgba(255,255,255,0.1)',
+            tickfont=dict(color='white'),
+            title_font=dict(color='white')
+        ),
+        legend=dict(font=dict(color='white')),
+        barmode='group'
+    )
+    return fig4
+
+
+def build_figures(selection, kinds=FIGURE_KINDS, data=None, summary=None, derived=None, stage=None):
+    """Build the requested figures for one selection, keyed by kind.
+
+    ``summary`` and ``derived`` are the results of ``summarise`` and
+    ``derive`` for the same selection, when the caller already has them.
+    ``stage``, if given, is called with ``'figure:<kind>'`` for a context
+    manager to time each figure in (e.g. a telemetry rerun's ``stage``).
+    """
+    data = _data(data)
+    if summary is None and any(kind != 'margins' for kind in kinds):
+        summary = summarise(selection, data)
+    built = {}
+    for kind in kinds:
+        with stage(f'figure:{kind}') if stage else nullcontext():
+            if kind == 'overview':
+                built[kind] = _overview_figure(selection, summary)
+            elif kind == 'sankey':
+                built[kind] = _sankey_figure(selection, summary)
+            elif kind == 'margins':
+                if derived is None:
+                    derived = derive(selection, data)
+                built[kind] = _margins_figure(derived['filtered'])
+            elif kind == 'performance':
+                built[kind] = _performance_figure(summary['performance'])
+            else:
+                raise ValueError(f'Unknown figure kind: {kind!r}')
+    return built
+
+
+def build_map(selection, metric='winner', geojson=None, data=None, derived=None):
+    """District choropleth of the winner or the victory margin.
+
+    ``geojson`` is the district outlines as a dict or, with static serving,
+    a URL (see ``geometry.static_url``); it defaults to the simplified
+    outlines at ``geometry.DEFAULT_DETAIL``.  Only the per-district values
+    change between selections, so with a URL the outlines are not part of
+    the figure.  ``derived`` is ``derive``'s result for the selection, if
+    the caller already has it.
+    """
+    data = _data(data)
+    if geojson is None:
+        geojson = district_geojson()
+    election = data.election
+    if derived is None:
+        derived = derive(selection, data)
+    selected = derived['filtered']
+
+    # Every district in grey underneath, so filtered-out ones keep their shape
+    fig = go.Figure(go.Choropleth(
+        geojson=geojson,
+        locations=election['district_id'].to_numpy(),
+        z=np.zeros(len(election), dtype=np.int8),
+        colorscale=[[0, '#334155'], [1, '#334155']],
+        showscale=False,
+        customdata=election['district'],
+        hovertemplate='%{customdata}<extra></extra>',
+        marker_line=dict(color='rgba(255,255,255,0.3)', width=0.5),
+        name='Not selected',
+    ))
+
+    if metric == 'winner':
+        for candidate in _winners(selection):
+            won = selected[selected['winner'] == candidate]
+            fig.add_trace(go.Choropleth(
+                geojson=geojson,
+                locations=won['district_id'].to_numpy(),
+                z=np.ones(len(won), dtype=np.int8),
+                colorscale=[[0, COLORS[candidate]], [1, COLORS[candidate]]],
+                showscale=False,
+                showlegend=True,
+                customdata=won[['district', 'margin_pct']],
+                hovertemplate=f'%{{customdata[0]}}<br>{candidate}, margin %{{customdata[1]:.1f}}%<extra></extra>',
+                marker_line=dict(color='white', width=0.5),
+                name=candidate,
+            ))
+        title = '<b>District Winners</b>'
+    elif metric == 'margin':
+        fig.add_trace(go.Choropleth(
+            geojson=geojson,
+            locations=selected['district_id'].to_numpy(),
+            z=selected['margin_pct'].to_numpy(),
+            colorscale='Greens',
+            colorbar=dict(title=dict(text='Margin (%)', font=dict(color='white')), tickfont=dict(color='white')),
+            customdata=selected[['district', 'winner']],
+            hovertemplate='%{customdata[0]}<br>%{customdata[1]}, margin %{z:.1f}%<extra></extra>',
+            marker_line=dict(color='white', width=0.5),
+            name='Margin',
+        ))
+        title = '<b>Victory Margin by District</b>'
+    else:
+        raise ValueError(f'Unknown map metric: {metric!r}')
+
+    fig.update_geos(fitbounds='locations', visible=False, bgcolor='rgba(0,0,0,0)')
+    fig.update_layout(
+        title={'text': title, 'x': 0.5, 'font': {'size': 18, 'color': 'white'}},
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        height=550,
+        margin=dict(l=0, r=0, t=50, b=0),
+        legend=dict(font=dict(color='white'))
+    )
+    return fig
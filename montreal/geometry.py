@@ -0,0 +1,133 @@
+"""District outlines for the choropleth, simplified once per detail level.
+
+The district GeoJSON bundled with Plotly Express is what makes the map
+heavy, so each detail level is simplified (Douglas-Peucker) and rounded
+once, cached in memory, and written as a static file.  With Streamlit's
+static serving on, figures reference the file by URL: the browser fetches
+the outline once per session and every filter change only re-sends the
+per-district values.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import plotly.express as px
+
+# Douglas-Peucker tolerance in degrees (0.0001° is roughly 10 m in Montreal)
+DETAIL_LEVELS = {'Full': 0.0, 'Fine': 0.0003, 'Medium': 0.001, 'Coarse': 0.003}
+DEFAULT_DETAIL = 'Medium'
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+STATIC_URL = 'app/static'
+GEOMETRY_SUBDIR = 'montreal'
+
+_simplified = {}
+_static_names = {}
+
+
+def simplify_ring(ring, tolerance):
+    """Douglas-Peucker simplification of one closed ring.
+
+    Keeps the first and last points and at least four in total, so the
+    result is still a valid GeoJSON ring.
+    """
+    ring = np.asarray(ring, dtype=np.float64)
+    if tolerance <= 0 or len(ring) <= 4:
+        return ring
+    keep = np.zeros(len(ring), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(ring) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        inner = ring[start + 1:end]
+        a, b = ring[start], ring[end]
+        direction = b - a
+        length = np.hypot(*direction)
+        if length == 0:
+            distance = np.hypot(*(inner - a).T)
+        else:
+            distance = np.abs(direction[0] * (inner[:, 1] - a[1]) - direction[1] * (inner[:, 0] - a[0])) / length
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    if keep.sum() < 4:
+        # Closed rings start and end on the same point, so the farthest
+        # interior points from it keep the shape
+        distance = np.hypot(*(ring - ring[0]).T)
+        distance[keep] = -1
+        keep[np.argsort(distance)[-(4 - keep.sum()):]] = True
+    return ring[keep]
+
+
+def _decimals(tolerance):
+    # Round to a tenth of the tolerance; full detail keeps ~1 m precision
+    return 5 if tolerance <= 0 else max(int(np.ceil(-np.log10(tolerance))) + 1, 1)
+
+
+def simplify_geojson(geojson, tolerance):
+    """Copy of a Polygon/MultiPolygon FeatureCollection simplified to ``tolerance``."""
+    decimals = _decimals(tolerance)
+
+    def ring(coords):
+        return np.round(simplify_ring(coords, tolerance), decimals).tolist()
+
+    features = []
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        if geometry['type'] == 'Polygon':
+            coordinates = [ring(r) for r in geometry['coordinates']]
+        elif geometry['type'] == 'MultiPolygon':
+            coordinates = [[ring(r) for r in polygon] for polygon in geometry['coordinates']]
+        else:
+            raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+        features.append({
+            'type': 'Feature',
+            'id': feature.get('id'),
+            'properties': feature.get('properties', {}),
+            'geometry': {'type': geometry['type'], 'coordinates': coordinates},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def district_geojson(detail=DEFAULT_DETAIL):
+    """The Montreal district outlines at one detail level, simplified once."""
+    if detail not in _simplified:
+        _simplified[detail] = simplify_geojson(px.data.election_geojson(), DETAIL_LEVELS[detail])
+    return _simplified[detail]
+
+
+def static_url(detail=DEFAULT_DETAIL, static_dir=None):
+    """Write the outlines for ``detail`` under ``static/`` and return their URL.
+
+    The file name carries a hash of its contents, so a new tolerance or
+    source geometry gets a new file (and URL) rather than the browser or a
+    stale file serving the old outline; earlier files for the detail level
+    are removed.  The URL is relative to the app page, as served by
+    Streamlit with ``server.enableStaticServing``.
+    """
+    directory = os.path.join(static_dir or STATIC_DIR, GEOMETRY_SUBDIR)
+    key = (detail, directory)
+    name = _static_names.get(key)
+    if name is None:
+        payload = json.dumps(district_geojson(detail), separators=(',', ':')).encode('utf-8')
+        prefix = f'districts_{detail.lower()}_'
+        name = f'{prefix}{hashlib.blake2b(payload, digest_size=8).hexdigest()}.json'
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            for stale in os.listdir(directory):
+                if stale.startswith(prefix) and stale.endswith('.json') and stale != name:
+                    os.remove(os.path.join(directory, stale))
+        _static_names[key] = name
+    return f'{STATIC_URL}/{GEOMETRY_SUBDIR}/{name}'
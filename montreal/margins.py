@@ -0,0 +1,53 @@
+"""Placings and victory margins for every district at once.
+
+Vote counts are one (district, candidate) array, so placings come from a
+single sort along the candidate axis instead of a Python ``sorted`` per row.
+With many candidates and only the podium needed, ``np.argpartition`` picks
+the top places first and only those are sorted.
+"""
+
+import numpy as np
+import pandas as pd
+
+PLACE_NAMES = ('first', 'second', 'third')
+
+
+def standings(votes, places=None):
+    """Candidate order and vote counts per row, highest first.
+
+    Returns ``(order, ranked)``, both (row, place) arrays: ``order`` holds
+    candidate column indices and ``ranked`` their votes.  ``places`` limits
+    the result to the top places.  Ties keep candidate column order when
+    every place is requested.
+    """
+    votes = np.asarray(votes)
+    n_candidates = votes.shape[1]
+    places = n_candidates if places is None else min(places, n_candidates)
+    if places < n_candidates:
+        top = np.argpartition(-votes, places - 1, axis=1)[:, :places]
+    else:
+        top = np.broadcast_to(np.arange(n_candidates), votes.shape)
+    top_votes = np.take_along_axis(votes, top, axis=1)
+    order = np.take_along_axis(top, np.argsort(-top_votes, axis=1, kind='stable'), axis=1)
+    return order, np.take_along_axis(votes, order, axis=1)
+
+
+def margin_columns(election, candidates, places=3):
+    """Per-district placings, margin and margin share as a DataFrame.
+
+    Columns: ``first_place``/``second_place``/``third_place`` (votes),
+    ``first_candidate``/``second_candidate``/``third_candidate``, ``margin``
+    (first minus second) and ``margin_pct`` (margin as % of ``total``).
+    """
+    names = np.asarray(candidates, dtype=object)
+    order, ranked = standings(election[list(candidates)].to_numpy(), places)
+
+    columns = {}
+    for place in range(ranked.shape[1]):
+        label = PLACE_NAMES[place] if place < len(PLACE_NAMES) else f'place_{place + 1}'
+        columns[f'{label}_place'] = ranked[:, place]
+        columns[f'{label}_candidate'] = names[order[:, place]]
+    second = ranked[:, 1] if ranked.shape[1] > 1 else np.zeros(len(ranked), dtype=ranked.dtype)
+    columns['margin'] = ranked[:, 0] - second
+    columns['margin_pct'] = (columns['margin'] / election['total'].to_numpy()) * 100
+    return pd.DataFrame(columns, index=election.index)
@@ -1,13 +1,14 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+from montreal import core, geometry
+from telemetry import view as profiling
 
 # Set the page title
 st.set_page_config(page_title="2013 Montreal Election Analysis", layout="wide")
 
+# Stage timings and chart sizes; a no-op unless DASHBOARD_PROFILE is set
+profile = profiling.start("montreal")
+
 # Remove whitespace and Streamlit branding
 st.markdown("""
 <style>
@@ -61,7 +62,7 @@ st.markdown(
             background-color: #013220;
             color: white;
         }
-        div.stMultiSelect label, div.stSelectbox label {
+        div.stMultiSelect label, div.stSelectbox label, div.stRadio label {
             color: white !important;
         }
         div[data-baseweb="tag"] {
@@ -77,21 +78,15 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Load election data
-election = px.data.election()
-
-# Calculate metrics
-winner_counts = election['winner'].value_counts()
-total_votes = {
-    'Coderre': election['Coderre'].sum(),
-    'Bergeron': election['Bergeron'].sum(),
-    'Joly': election['Joly'].sum()
-}
-total_all_votes = sum(total_votes.values())
+# Load election data once per process, with its group totals precomputed;
+# all computation lives in montreal.core and this script only lays it out.
+@st.cache_resource
+def load_election():
+    return core.load()
 
-# Consistent color scheme
-colors = {'Coderre': '#6366F1', 'Bergeron': '#EF4444', 'Joly': '#10B981'}
-candidates_order = ['Coderre', 'Bergeron', 'Joly']
+with profile.stage('load'):
+    data = load_election()
+candidates_order = list(core.CANDIDATES)
 
 # Title
 st.markdown("<h1 style='text-align: center; color: white;'>2013 Montreal Mayoral Election</h1>", unsafe_allow_html=True)
@@ -136,281 +131,24 @@ with col2:
         key="result_filter"
     )
 
-# Filter data
-filtered_election = election[
-    (election['winner'].isin(winner_filter)) & 
-    (election['result'].isin(result_filter))
-]
-
-# Recalculate metrics for filtered data
-filtered_winner_counts = filtered_election['winner'].value_counts()
-filtered_total_votes = {
-    'Coderre': filtered_election['Coderre'].sum(),
-    'Bergeron': filtered_election['Bergeron'].sum(),
-    'Joly': filtered_election['Joly'].sum()
-}
+# Filter data and build the charts
+selection = core.Selection(tuple(winner_filter), tuple(result_filter))
+with profile.stage('summarise'):
+    summary = core.summarise(selection, data)
+    derived = core.derive(selection, data)
+winner_counts = summary['winner_counts']
+total_votes = summary['total_votes']
 
 st.markdown("<br>", unsafe_allow_html=True)
 
-# ============ CHART 1: Districts Won vs Popular Vote (Your existing chart) ============
-fig1 = make_subplots(
-    rows=2, cols=2,
-    specs=[[{"type": "pie"}, {"type": "pie"}],
-           [{"type": "bar", "colspan": 2}, None]],
-    subplot_titles=("<b style='color:white;'>Districts Won</b> (of 58)", 
-                    "<b style='color:white;'>Popular Vote Share</b>",
-                    "<b style='color:white;'>Comparison: Districts Won vs Popular Vote</b>"),
-    vertical_spacing=0.15,
-    horizontal_spacing=0.12
-)
-
-# Districts Won Pie Chart
-fig1.add_trace(go.Pie(
-    labels=[c for c in candidates_order if c in winner_filter],
-    values=[filtered_winner_counts.get(c, 0) for c in candidates_order if c in winner_filter],
-    hole=0.4,
-    marker=dict(colors=[colors[c] for c in candidates_order if c in winner_filter]),
-    texttemplate='<b>%{label}</b><br>%{value}<br>(%{percent})',
-    textfont=dict(size=12, family='Arial, sans-serif', color='white'),
-    hovertemplate='<b>%{label}</b><br>Districts: %{value}<br>%{percent}<extra></extra>',
-    showlegend=False
-), row=1, col=1)
-
-# Popular Vote Pie Chart
-fig1.add_trace(go.Pie(
-    labels=[c for c in candidates_order if c in winner_filter],
-    values=[filtered_total_votes[c] for c in candidates_order if c in winner_filter],
-    hole=0.4,
-    marker=dict(colors=[colors[c] for c in candidates_order if c in winner_filter]),
-    texttemplate='<b>%{label}</b><br>%{value:,}<br>(%{percent})',
-    textfont=dict(size=12, family='Arial, sans-serif', color='white'),
-    hovertemplate='<b>%{label}</b><br>Votes: %{value:,}<br>%{percent}<extra></extra>',
-    showlegend=False
-), row=1, col=2)
-
-# Bar chart
-for candidate in [c for c in candidates_order if c in winner_filter]:
-    # Districts
-    fig1.add_trace(go.Bar(
-        name=candidate,
-        x=['Districts Won'],
-        y=[filtered_winner_counts.get(candidate, 0)],
-        marker_color=colors[candidate],
-        text=[f"<b>{filtered_winner_counts.get(candidate, 0)}</b>"],
-        textposition='outside',
-        textfont=dict(size=13, color='white'),
-        showlegend=True,
-        legendgroup=candidate
-    ), row=2, col=1)
-    
-    # Popular Vote
-    fig1.add_trace(go.Bar(
-        name=candidate,
-        x=['Popular Vote (thousands)'],
-        y=[filtered_total_votes[candidate]/1000],
-        marker_color=colors[candidate],
-        text=[f"<b>{filtered_total_votes[candidate]:,}</b>"],
-        textposition='outside',
-        textfont=dict(size=13, color='white'),
-        showlegend=False,
-        legendgroup=candidate
-    ), row=2, col=1)
-
-fig1.update_layout(
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(0,0,0,0)',
-    font=dict(color='white', family='Arial'),
-    height=650,
-    showlegend=True,
-    legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.15,
-        xanchor="center",
-        x=0.5,
-        font=dict(color='white', size=12)
-    ),
-    margin=dict(l=40, r=40, t=80, b=80)
-)
-
-fig1.update_yaxes(
-    gridcolor='rgba(255,255,255,0.1)',
-    title_font=dict(color='white'),
-    tickfont=dict(color='white'),
-    row=2, col=1
-)
-
-fig1.update_xaxes(
-    title_font=dict(color='white'),
-    tickfont=dict(color='white'),
-    row=2, col=1
-)
-
-for annotation in fig1['layout']['annotations']:
-    annotation['font'] = dict(size=14, color='white')
-
-# ============ CHART 2: Sankey Diagram ============
-result_winner_counts = filtered_election.groupby(['result', 'winner']).size().reset_index(name='count')
-
-result_labels = [
-    '<b>Plurality</b><br>(< 50% votes)',
-    '<b>Majority</b><br>(> 50% votes)'
-]
-winner_labels = [f'<b>{c}</b>' for c in candidates_order if c in winner_filter]
-all_labels = result_labels + winner_labels
-
-result_mapping = {'plurality': 0, 'majority': 1}
-winner_mapping = {c: i + 2 for i, c in enumerate([c for c in candidates_order if c in winner_filter])}
-
-source = [result_mapping[row['result']] for _, row in result_winner_counts.iterrows()]
-target = [winner_mapping[row['winner']] for _, row in result_winner_counts.iterrows()]
-value = result_winner_counts['count'].tolist()
-
-colors_sankey = {
-    'Coderre': 'rgba(99, 102, 241, 0.4)',
-    'Bergeron': 'rgba(239, 68, 68, 0.4)',
-    'Joly': 'rgba(16, 185, 129, 0.4)'
-}
-
-link_colors = [colors_sankey[result_winner_counts.iloc[i]['winner']] for i in range(len(source))]
-
-fig2 = go.Figure(data=[go.Sankey(
-    node=dict(
-        pad=20,
-        thickness=25,
-        line=dict(color="white", width=0.5),
-        label=all_labels,
-        color=['#94A3B8', '#94A3B8'] + [colors[c] for c in candidates_order if c in winner_filter],
-    ),
-    link=dict(
-        source=source,
-        target=target,
-        value=value,
-        color=link_colors
-    )
-)])
-
-fig2.update_layout(
-    title={
-        'text': "<b>How Candidates Won: Majority vs Plurality</b>",
-        'x': 0.5,
-        'xanchor': 'center',
-        'font': {'size': 18, 'color': 'white'}
-    },
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(0,0,0,0)',
-    font=dict(color='white', size=12),
-    height=500,
-    margin=dict(l=20, r=20, t=60, b=40)
-)
-
-# ============ CHART 3: Vote Margin Analysis ============
-election_margins = filtered_election.copy()
-vote_cols = ['Coderre', 'Bergeron', 'Joly']
-election_margins['first_place'] = election_margins[vote_cols].max(axis=1)
-election_margins['second_place'] = election_margins[vote_cols].apply(
-    lambda row: sorted(row, reverse=True)[1], axis=1
-)
-election_margins['margin'] = election_margins['first_place'] - election_margins['second_place']
-election_margins['margin_pct'] = (election_margins['margin'] / election_margins['total']) * 100
-
-fig3 = px.scatter(
-    election_margins,
-    x='total',
-    y='margin_pct',
-    color='winner',
-    color_discrete_map=colors,
-    size='margin',
-    hover_data=['district', 'result'],
-    title='<b>Victory Margins Across Districts</b>',
-    labels={'total': 'Total Votes in District', 'margin_pct': 'Victory Margin (%)'}
-)
-
-fig3.update_layout(
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(0,0,0,0)',
-    font=dict(color='white'),
-    height=450,
-    title_x=0.5,
-    title_font=dict(size=18),
-    xaxis=dict(
-        gridcolor='rgba(255,255,255,0.1)',
-        title_font=dict(color='white'),
-        tickfont=dict(color='white')
-    ),
-    yaxis=dict(
-        gridcolor='rgba(255,255,255,0.1)',
-        title_font=dict(color='white'),
-        tickfont=dict(color='white')
-    ),
-    legend=dict(font=dict(color='white'))
-)
-
-# ============ CHART 4: District Performance Breakdown ============
-performance_data = []
-for candidate in candidates_order:
-    if candidate in winner_filter:
-        wins = filtered_election[filtered_election['winner'] == candidate]
-        performance_data.append({
-            'Candidate': candidate,
-            'Districts Won': len(wins),
-            'Avg Votes': wins[candidate].mean(),
-            'Total Votes': wins[candidate].sum(),
-            'Avg Margin': wins.apply(lambda row: row[candidate] - sorted([row['Coderre'], row['Bergeron'], row['Joly']], reverse=True)[1], axis=1).mean()
-        })
-
-perf_df = pd.DataFrame(performance_data)
-
-fig4 = go.Figure()
-for i, candidate in enumerate(perf_df['Candidate']):
-    fig4.add_trace(go.Bar(
-        name=candidate,
-        x=['Districts Won', 'Avg Votes per District', 'Avg Victory Margin'],
-        y=[
-            perf_df.loc[i, 'Districts Won'],
-            perf_df.loc[i, 'Avg Votes'] / 100,  # Scale down for visibility
-            perf_df.loc[i, 'Avg Margin'] / 100   # Scale down for visibility
-        ],
-        marker_color=colors[candidate],
-        text=[
-            f"{perf_df.loc[i, 'Districts Won']:.0f}",
-            f"{perf_df.loc[i, 'Avg Votes']:.0f}",
-            f"{perf_df.loc[i, 'Avg Margin']:.0f}"
-        ],
-        textposition='outside',
-        textfont=dict(color='white', size=12),
-        hovertemplate=f'<b>{candidate}</b><br>%{{x}}: %{{text}}<extra></extra>'
-    ))
-
-fig4.update_layout(
-    title={
-        'text': '<b>Candidate Performance Metrics</b>',
-        'x': 0.5,
-        'font': {'size': 18, 'color': 'white'}
-    },
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(0,0,0,0)',
-    font=dict(color='white'),
-    height=450,
-    xaxis=dict(
-        tickfont=dict(color='white'),
-        showgrid=False
-    ),
-    yaxis=dict(
-        title='Scaled Values (÷100 for visibility)',
-        gridcolor='rgba(255,255,255,0.1)',
-        tickfont=dict(color='white'),
-        title_font=dict(color='white')
-    ),
-    legend=dict(font=dict(color='white')),
-    barmode='group'
-)
+figures = core.build_figures(selection, core.FIGURE_KINDS, data, summary, derived, stage=profile.stage)
+fig1, fig2, fig3, fig4 = (figures[kind] for kind in core.FIGURE_KINDS)
 
 # ============ Display Charts in 2x2 Grid ============
 col1, col2 = st.columns(2)
 
 with col1:
-    st.plotly_chart(fig1, use_container_width=True)
+    profiling.plotly_chart(profile, 'overview', fig1, use_container_width=True)
     st.markdown("""
         <p style='color: white; font-size: 14px; line-height: 1.6;'>
         <b>The Electoral Paradox:</b> Coderre won 50% of districts but only 38% of the popular vote. 
@@ -419,7 +157,7 @@ with col1:
         </p>
     """, unsafe_allow_html=True)
     
-    st.plotly_chart(fig3, use_container_width=True)
+    profiling.plotly_chart(profile, 'margins', fig3, use_container_width=True)
     st.markdown("""
         <p style='color: white; font-size: 14px; line-height: 1.6;'>
         <b>Competitive Races:</b> Larger bubbles indicate bigger victory margins. Many of Coderre's wins 
@@ -429,7 +167,7 @@ with col1:
     """, unsafe_allow_html=True)
 
 with col2:
-    st.plotly_chart(fig2, use_container_width=True)
+    profiling.plotly_chart(profile, 'sankey', fig2, use_container_width=True)
     st.markdown("""
         <p style='color: white; font-size: 14px; line-height: 1.6;'>
         <b>The Split Vote Effect:</b> This flow diagram shows that Coderre won most districts by plurality 
@@ -438,7 +176,7 @@ with col2:
         </p>
     """, unsafe_allow_html=True)
     
-    st.plotly_chart(fig4, use_container_width=True)
+    profiling.plotly_chart(profile, 'performance', fig4, use_container_width=True)
     st.markdown("""
         <p style='color: white; font-size: 14px; line-height: 1.6;'>
         <b>Performance Comparison:</b> While Coderre won the most districts, Bergeron averaged more votes 
@@ -447,6 +185,41 @@ with col2:
         </p>
     """, unsafe_allow_html=True)
 
+# ============ District Map ============
+st.markdown("<br>", unsafe_allow_html=True)
+map_col1, map_col2 = st.columns([1, 1])
+with map_col1:
+    map_metric = st.radio(
+        "Colour districts by",
+        options=core.MAP_METRICS,
+        format_func=lambda m: {'winner': 'Winner', 'margin': 'Victory margin'}[m],
+        horizontal=True,
+        key="map_metric"
+    )
+with map_col2:
+    map_detail = st.selectbox(
+        "Outline detail",
+        options=list(geometry.DETAIL_LEVELS),
+        index=list(geometry.DETAIL_LEVELS).index(geometry.DEFAULT_DETAIL),
+        key="map_detail"
+    )
+
+# With static serving the browser fetches the outlines once by URL and
+# reruns only send the per-district values
+with profile.stage('figure:map'):
+    if st.get_option("server.enableStaticServing"):
+        district_outlines = geometry.static_url(map_detail)
+    else:
+        district_outlines = geometry.district_geojson(map_detail)
+    fig5 = core.build_map(selection, map_metric, district_outlines, data, derived)
+profiling.plotly_chart(profile, 'map', fig5, use_container_width=True)
+st.markdown("""
+    <p style='color: white; font-size: 14px; line-height: 1.6;'>
+    <b>The Geography of the Vote:</b> Districts outside the current filters stay grey. Switch to the 
+    victory margin to see where the race was close and where a candidate won comfortably.
+    </p>
+""", unsafe_allow_html=True)
+
 # Summary Statistics
 st.markdown("<br><br>", unsafe_allow_html=True)
 st.markdown("<h3 style='text-align: center; color: white;'>Key Electoral Statistics</h3>", unsafe_allow_html=True)
@@ -505,3 +278,5 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+profiling.finish(profile)
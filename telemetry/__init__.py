@@ -0,0 +1 @@
+"""Per-rerun timings and payload sizes for the Streamlit dashboards."""
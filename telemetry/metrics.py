@@ -0,0 +1,188 @@
+"""Stage timings and payload sizes for one rerun, plus process-wide totals.
+
+Profiling is off unless ``DASHBOARD_PROFILE`` is set (``1``/``true``/``yes``).
+When it is off, ``start_rerun`` hands out a shared ``NullRerun`` whose
+``stage`` returns a reusable no-op context manager, so instrumented code pays
+one attribute lookup and an empty ``with`` block per stage.
+
+Finished reruns are written to the ``dashboard.profile`` logger as one JSON
+line each and folded into ``REGISTRY``, which renders the Prometheus text
+exposition format for a local scrape.  Caches registered with
+``register_cache`` are read through their ``stats()`` at scrape time.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+ENV_VAR = 'DASHBOARD_PROFILE'
+
+logger = logging.getLogger('dashboard.profile')
+
+
+def enabled():
+    """Whether profiling is switched on for this process."""
+    return os.environ.get(ENV_VAR, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Rerun:
+    """Wall time per stage and bytes per chart for one script run."""
+
+    enabled = True
+
+    def __init__(self, app):
+        self.app = app
+        self.started = time.perf_counter()
+        self.stages = []
+        self.payloads = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def payload(self, chart, nbytes):
+        self.payloads[chart] = nbytes
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def record(self):
+        """The rerun as a JSON-serialisable dict."""
+        return {
+            'app': self.app,
+            'total_s': round(self.elapsed, 6),
+            'stages': [{'stage': name, 'seconds': round(seconds, 6)} for name, seconds in self.stages],
+            'payload_bytes': dict(self.payloads),
+        }
+
+
+class NullRerun:
+    """Stand-in used when profiling is disabled; every method is a no-op."""
+
+    enabled = False
+    stages = ()
+    payloads = {}
+    _context = nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def payload(self, chart, nbytes):
+        pass
+
+
+NULL_RERUN = NullRerun()
+
+
+def start_rerun(app):
+    """A ``Rerun`` recorder when profiling is enabled, else ``NULL_RERUN``."""
+    return Rerun(app) if enabled() else NULL_RERUN
+
+
+# Metrics read from a cache's ``stats()`` dict; caches report the keys they have
+CACHE_METRICS = {
+    'hits': ('dashboard_cache_hits_total', 'counter', 'Cache lookups served from the cache.'),
+    'misses': ('dashboard_cache_misses_total', 'counter', 'Cache lookups that had to build the entry.'),
+    'evictions': ('dashboard_cache_evictions_total', 'counter', 'Cache entries dropped to stay within bounds.'),
+    'entries': ('dashboard_cache_entries', 'gauge', 'Entries currently held by the cache.'),
+    'bytes': ('dashboard_cache_bytes', 'gauge', 'Bytes currently held by the cache.'),
+}
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    """Thread-safe totals across reruns, in Prometheus text format on demand."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reruns = defaultdict(int)
+        self._rerun_seconds = defaultdict(float)
+        self._stage_seconds = defaultdict(float)
+        self._stage_count = defaultdict(int)
+        self._payload_bytes = {}
+        self._caches = {}
+
+    def register_cache(self, app, name, stats):
+        """Report a cache: ``stats()`` returns a dict with keys from ``CACHE_METRICS``.
+
+        Registering the same (app, name) again replaces the earlier entry.
+        """
+        with self._lock:
+            self._caches[app, name] = stats
+
+    def cache_stats(self, app=None):
+        """Current stats of every registered cache (of ``app``), keyed by (app, name)."""
+        with self._lock:
+            caches = [(key, stats) for key, stats in self._caches.items() if app is None or key[0] == app]
+        # Each cache takes its own lock, so read them outside ours
+        return {key: stats() for key, stats in caches}
+
+    def observe(self, rerun):
+        with self._lock:
+            self._reruns[rerun.app] += 1
+            self._rerun_seconds[rerun.app] += rerun.elapsed
+            for name, seconds in rerun.stages:
+                self._stage_seconds[rerun.app, name] += seconds
+                self._stage_count[rerun.app, name] += 1
+            for chart, nbytes in rerun.payloads.items():
+                self._payload_bytes[rerun.app, chart] = nbytes
+
+    def prometheus_text(self):
+        caches = self.cache_stats()
+        with self._lock:
+            lines = [
+                '# HELP dashboard_reruns_total Script reruns completed.',
+                '# TYPE dashboard_reruns_total counter',
+            ]
+            lines += [f'dashboard_reruns_total{{app="{_label(app)}"}} {n}' for app, n in self._reruns.items()]
+            lines += [
+                '# HELP dashboard_rerun_seconds_total Wall time spent in reruns.',
+                '# TYPE dashboard_rerun_seconds_total counter',
+            ]
+            lines += [f'dashboard_rerun_seconds_total{{app="{_label(app)}"}} {s:.6f}'
+                      for app, s in self._rerun_seconds.items()]
+            lines += [
+                '# HELP dashboard_stage_seconds Wall time per rerun stage.',
+                '# TYPE dashboard_stage_seconds summary',
+            ]
+            for (app, name), seconds in self._stage_seconds.items():
+                labels = f'app="{_label(app)}",stage="{_label(name)}"'
+                lines.append(f'dashboard_stage_seconds_sum{{{labels}}} {seconds:.6f}')
+                lines.append(f'dashboard_stage_seconds_count{{{labels}}} {self._stage_count[app, name]}')
+            lines += [
+                '# HELP dashboard_chart_bytes Serialised size of the last payload sent per chart.',
+                '# TYPE dashboard_chart_bytes gauge',
+            ]
+            lines += [f'dashboard_chart_bytes{{app="{_label(app)}",chart="{_label(chart)}"}} {nbytes}'
+                      for (app, chart), nbytes in self._payload_bytes.items()]
+        for key, (metric, kind, help_text) in CACHE_METRICS.items():
+            samples = [(app, name, stats[key]) for (app, name), stats in caches.items() if key in stats]
+            if not samples:
+                continue
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            lines += [f'{metric}{{app="{_label(app)}",cache="{_label(name)}"}} {value}'
+                      for app, name, value in samples]
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def finish_rerun(rerun, registry=REGISTRY):
+    """Log a finished rerun as one JSON line and add it to ``registry``."""
+    if not rerun.enabled:
+        return
+    registry.observe(rerun)
+    logger.info(json.dumps(rerun.record(), ensure_ascii=False))
@@ -0,0 +1,106 @@
+"""Streamlit side of the profiling: chart wrapper, debug panel, metrics endpoint.
+
+Both dashboards call ``start`` at the top of the script, route their charts
+through ``plotly_chart`` and call ``finish`` at the end.  With profiling
+disabled these are thin pass-throughs.
+
+Set ``DASHBOARD_METRICS_PORT`` as well to serve the Prometheus text format on
+``http://127.0.0.1:<port>/metrics`` from a background thread.  Caches passed
+to ``register_cache`` are exported there too.
+"""
+
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import plotly.io as pio
+import streamlit as st
+
+from .metrics import REGISTRY, finish_rerun, logger, start_rerun
+
+PORT_ENV_VAR = 'DASHBOARD_METRICS_PORT'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@st.cache_resource
+def _metrics_server(port):
+    server = ThreadingHTTPServer(('127.0.0.1', port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='dashboard-metrics', daemon=True).start()
+    return server
+
+
+@st.cache_resource
+def _log_handler():
+    # JSON lines go to stderr next to Streamlit's own log output
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return handler
+
+
+def start(app):
+    """Begin recording one rerun of ``app``."""
+    rerun = start_rerun(app)
+    if rerun.enabled:
+        _log_handler()
+        port = os.environ.get(PORT_ENV_VAR)
+        if port:
+            _metrics_server(int(port))
+    return rerun
+
+
+def register_cache(app, name, stats):
+    """Export a cache's ``stats()`` (hits, misses, evictions, entries, bytes)."""
+    REGISTRY.register_cache(app, name, stats)
+
+
+def plotly_chart(rerun, name, figure, **kwargs):
+    """``st.plotly_chart`` that records serialisation time and payload size."""
+    if not rerun.enabled:
+        return st.plotly_chart(figure, **kwargs)
+    # Serialise once up front to measure it; Streamlit repeats the same call
+    with rerun.stage(f'serialise:{name}'):
+        spec = pio.to_json(figure, validate=False)
+    rerun.payload(name, len(spec.encode('utf-8')))
+    with rerun.stage(f'chart:{name}'):
+        return st.plotly_chart(figure, **kwargs)
+
+
+def finish(rerun):
+    """Log the rerun, add it to the scrape totals and show the debug panel."""
+    if not rerun.enabled:
+        return
+    finish_rerun(rerun)
+    with st.expander("🛠️ Rerun profile", expanded=False):
+        st.markdown(f"**Total:** {rerun.elapsed * 1000:.1f} ms")
+        stages = pd.DataFrame(rerun.stages, columns=['Stage', 'Seconds'])
+        stages['ms'] = stages.pop('Seconds') * 1000
+        st.dataframe(stages, hide_index=True, use_container_width=True,
+                     column_config={'ms': st.column_config.NumberColumn(format="%.2f")})
+        if rerun.payloads:
+            payloads = pd.DataFrame(list(rerun.payloads.items()), columns=['Chart', 'Bytes'])
+            st.dataframe(payloads, hide_index=True, use_container_width=True)
+        caches = REGISTRY.cache_stats(rerun.app)
+        if caches:
+            st.markdown("**Caches** (since the process started)")
+            st.dataframe(pd.DataFrame([{'Cache': name, **stats} for (_, name), stats in caches.items()]),
+                         hide_index=True, use_container_width=True)
@@ -0,0 +1,6 @@
+"""Unit tests for the compute packages; run ``python -m pytest tests`` from the repository root."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
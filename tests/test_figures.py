@@ -0,0 +1,33 @@
+"""CachedFigure relies on plotly going through ``to_dict()``; check that it still does."""
+
+import json
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import plotly.tools
+
+from heatwave.figures import CachedFigure, FigureCache
+
+
+def _figure():
+    return go.Figure(go.Scatter(x=[1, 2, 3], y=[4, 5, 6], name='cached'))
+
+
+def test_streamlit_conversion_uses_cached_spec():
+    spec = pio.to_json(_figure(), validate=False)
+    converted = plotly.tools.return_figure_from_figure_or_data(CachedFigure(spec), validate_figure=True)
+    assert converted == json.loads(spec)
+
+
+def test_to_json_round_trips():
+    spec = pio.to_json(_figure(), validate=False)
+    assert json.loads(pio.to_json(CachedFigure(spec), validate=False)) == json.loads(spec)
+
+
+def test_figure_cache_counts():
+    cache = FigureCache(max_entries=1)
+    cache.figure('a', _figure)
+    cache.figure('a', _figure)
+    cache.figure('b', _figure)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 2, 1, 1)
@@ -0,0 +1,30 @@
+"""``core.load`` keeps its ``Dataset`` until the CSV changes."""
+
+import os
+import shutil
+from unittest import mock
+
+from heatwave import cache, core
+from heatwave.schema import CSV_PATH
+
+
+def test_load_rehashes_only_when_the_csv_changes(tmp_path):
+    csv_path = str(tmp_path / 'grid.csv')
+    shutil.copyfile(CSV_PATH, csv_path)
+    cache_dir = str(tmp_path / 'cache')
+    first = core.load(csv_path, cache_dir)
+
+    with mock.patch.object(core, 'load_columns', wraps=cache.load_columns) as load_columns:
+        assert core.load(csv_path, cache_dir) is first
+        assert load_columns.call_count == 0
+
+        # Same contents, new mtime: re-hashed, same data version
+        stat = os.stat(csv_path)
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert core.load(csv_path, cache_dir) is first
+        assert load_columns.call_count == 1
+
+        with open(csv_path, 'a', encoding='utf-8') as fh:
+            fh.write('\n')
+        assert core.load(csv_path, cache_dir) is not first
+        assert load_columns.call_count == 2
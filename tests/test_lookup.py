@@ -0,0 +1,31 @@
+"""Looked-up records carry the CSV's values, without float32 rounding noise."""
+
+import numpy as np
+import pandas as pd
+
+from heatwave import core
+from heatwave.schema import CSV_PATH
+
+
+def test_records_match_csv():
+    data = core.load()
+    csv = pd.read_csv(CSV_PATH, encoding='utf-8-sig')
+    rows = csv.iloc[::97]
+    found = data.locator.records(rows['Latitude'].to_numpy(), rows['Longitude'].to_numpy())
+    assert (found['OBJECTID'].to_numpy() == rows['OBJECTID'].to_numpy()).all()
+    for name in csv.columns:
+        np.testing.assert_array_equal(found[name].to_numpy(), rows[name].to_numpy(dtype=np.float64), err_msg=name)
+
+
+def test_record_matches_records():
+    data = core.load()
+    record = data.locator.record(51.5074, -0.1278)
+    row = data.locator.records([51.5074], [-0.1278]).iloc[0]
+    assert record['HSD baseline 1981-2000 median'] == 2.2
+    for name in data.store.names:
+        assert record[name] == row[name], name
+
+
+def test_unresolved_points_are_nan():
+    found = core.load().locator.records([40.0], [-30.0])
+    assert found['Latitude'].isna().all()
@@ -0,0 +1,27 @@
+"""Figures built from a caller's summary and rows match those built from scratch."""
+
+import plotly.io as pio
+
+from montreal import core
+
+SELECTION = core.Selection(('Coderre', 'Joly'), ('plurality',))
+
+
+def _json(fig):
+    return pio.to_json(fig, validate=False)
+
+
+def test_build_figures_reuses_summary_and_rows():
+    data = core.load()
+    fresh = core.build_figures(SELECTION, data=data)
+    reused = core.build_figures(SELECTION, data=data, summary=core.summarise(SELECTION, data),
+                                derived=core.derive(SELECTION, data))
+    assert {kind: _json(fig) for kind, fig in reused.items()} == {kind: _json(fig) for kind, fig in fresh.items()}
+
+
+def test_build_map_reuses_rows():
+    data = core.load()
+    outlines = {'type': 'FeatureCollection', 'features': []}
+    fresh = core.build_map(SELECTION, 'margin', outlines, data)
+    reused = core.build_map(SELECTION, 'margin', outlines, data, derived=core.derive(SELECTION, data))
+    assert _json(reused) == _json(fresh)
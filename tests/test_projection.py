@@ -0,0 +1,30 @@
+"""The fitted projection reproduces the grid's own coordinates."""
+
+import numpy as np
+
+from heatwave import core
+from heatwave.projection import GridProjection
+
+# Far below the 12 km grid spacing
+FORWARD_TOLERANCE_M = 100
+INVERSE_TOLERANCE_DEG = 0.005
+
+
+def _coordinates():
+    store = core.load().store
+    return [np.asarray(store.column(name), dtype=np.float64)
+            for name in ('Latitude', 'Longitude', 'Projection_x_coordinate', 'Projection_y_coordinate')]
+
+
+def test_forward_fit():
+    latitude, longitude, x, y = _coordinates()
+    fx, fy = GridProjection(latitude, longitude, x, y).forward(latitude, longitude)
+    assert np.abs(fx - x).max() < FORWARD_TOLERANCE_M
+    assert np.abs(fy - y).max() < FORWARD_TOLERANCE_M
+
+
+def test_inverse_fit():
+    latitude, longitude, x, y = _coordinates()
+    fitted_latitude, fitted_longitude = GridProjection(latitude, longitude, x, y).inverse(x, y)
+    assert np.abs(fitted_latitude - latitude).max() < INVERSE_TOLERANCE_DEG
+    assert np.abs(fitted_longitude - longitude).max() < INVERSE_TOLERANCE_DEG
@@ -0,0 +1,46 @@
+"""Threshold crossings on synthetic curves with known answers."""
+
+import numpy as np
+import pytest
+
+from heatwave.schema import CONFIDENCE_LEVELS, WARMING_SCENARIOS, scenario_column
+from heatwave.warming import WARMING_LEVELS, WarmingCurve
+
+# Hot days per cell at 1.5, 2, 2.5, 3 and 4°C, increasing with warming
+CELLS = np.array([
+    [0, 2, 4, 10, 20],        # crosses mid-segment
+    [5, 10, 15, 20, 30],      # linear in the level
+    [12, 14, 16, 18, 22],     # already above 10 at 1.5°C
+    [0, 0, 1, 2, 3],          # never reaches 10
+], dtype=np.float32)
+
+
+@pytest.fixture
+def curve():
+    columns = {scenario_column(s, c): CELLS[:, i] * (1 + k)
+               for k, c in enumerate(CONFIDENCE_LEVELS) for i, s in enumerate(WARMING_SCENARIOS)}
+    return WarmingCurve(columns)
+
+
+def test_crossing_levels(curve):
+    crossing = curve.crossing(10, 'lower')
+    # 2.5 + (10 - 4) / (10 - 4) * 0.5, 2 exactly at a modelled level, 1.5 already there, never
+    np.testing.assert_allclose(crossing, [3.0, 2.0, 1.5, np.nan], rtol=1e-6)
+
+
+def test_crossing_mid_segment(curve):
+    crossing = curve.crossing(7, 'lower')
+    np.testing.assert_allclose(crossing[:2], [2.5 + 3 / 6 * 0.5, 1.5 + 2 / 5 * 0.5], rtol=1e-6)
+
+
+def test_crossing_inverts_at(curve):
+    """The grid at each crossing level is the threshold, for cells that cross mid-range."""
+    for confidence in CONFIDENCE_LEVELS:
+        crossing = curve.crossing(9, confidence)
+        inside = (crossing > WARMING_LEVELS[0]) & ~np.isnan(crossing)
+        for cell in np.flatnonzero(inside):
+            assert curve.at(crossing[cell], confidence)[cell] == pytest.approx(9, rel=1e-5)
+
+
+def test_threshold_never_reached_is_nan(curve):
+    assert np.isnan(curve.crossing(1000, 'upper')).all()
@@ -0,0 +1,43 @@
+"""Weighted quantiles against numpy references."""
+
+import numpy as np
+import pytest
+
+from heatwave.weights import weighted_mean, weighted_quantiles
+
+QUANTILES = np.array([0, 0.1, 0.25, 0.5, 0.75, 0.9, 1])
+
+
+@pytest.fixture
+def block():
+    return np.random.default_rng(0).normal(size=(501, 6))
+
+
+def _reference(block, quantiles, **kwargs):
+    return np.stack([np.percentile(column, quantiles * 100, method='inverted_cdf', **kwargs)
+                     for column in block.T], axis=1)
+
+
+def test_integer_weights_match_expanded_sample(block):
+    weights = np.random.default_rng(1).integers(0, 6, len(block))
+    expanded = np.repeat(block, weights, axis=0)
+    expected = _reference(expanded, QUANTILES)
+    np.testing.assert_array_equal(weighted_quantiles(block, weights, QUANTILES), expected)
+
+
+def test_float_weights_match_numpy_weighted_percentile(block):
+    weights = np.random.default_rng(2).random(len(block))
+    expected = _reference(block, QUANTILES, weights=weights)
+    np.testing.assert_array_equal(weighted_quantiles(block, weights, QUANTILES), expected)
+
+
+def test_one_dimensional_input(block):
+    weights = np.ones(len(block))
+    np.testing.assert_array_equal(weighted_quantiles(block[:, 0], weights, QUANTILES),
+                                  _reference(block[:, :1], QUANTILES)[:, 0])
+
+
+def test_weighted_mean(block):
+    weights = np.random.default_rng(4).random(len(block))
+    np.testing.assert_allclose(weighted_mean(block, weights / weights.sum()),
+                               np.average(block, axis=0, weights=weights))